@@ -4,6 +4,96 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from http_cache import get_http_cache
+from diff_store import get_diff_store
+from llm_cache import get_llm_cache
+from diff_filter import filter_totals
+from github_rate_limit import get_governor
+from usage_store import get_usage_store
+
+
+def render_cache_stats():
+    st.markdown("### 🗄️ Cache Statistics")
+    caches = [
+        ("GitHub HTTP cache", get_http_cache()),
+        ("Diff store", get_diff_store()),
+        ("LLM result cache", get_llm_cache()),
+    ]
+    for col, (label, cache) in zip(st.columns(len(caches)), caches):
+        with col:
+            st.markdown(f"**{label}**")
+            if cache is None:
+                st.caption("Disabled")
+            else:
+                st.json(cache.stats())
+
+
+def render_diff_filter_stats():
+    st.markdown("### ✂️ Diff Filter Savings")
+    totals = filter_totals()
+    if not totals:
+        st.caption("No files filtered out of diffs yet")
+        return
+    st.dataframe(
+        pd.DataFrame([
+            {"Rule": rule, "Files": saved["files"], "Bytes Saved": saved["bytes"], "Tokens Saved": saved["tokens"]}
+            for rule, saved in totals.items()
+        ]),
+        use_container_width=True
+    )
+
+
+def render_rate_limit_stats():
+    st.markdown("### 🚦 GitHub Rate Limits")
+    governor = get_governor()
+    if governor is None:
+        st.caption("Disabled")
+        return
+    stats = governor.stats()
+    waiting = governor.waiting()
+    if waiting:
+        st.warning(f"Waiting for GitHub rate limit ({waiting['reason']}), resuming in {waiting['seconds']}s")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rate-limit waits", stats["waits"])
+    col2.metric("Retries", stats["retries"])
+    col3.metric("Secondary limits hit", stats["secondary_limits"])
+    if stats["budgets"]:
+        st.dataframe(pd.DataFrame(stats["budgets"]), use_container_width=True)
+
+
+def render_usage_stats():
+    st.markdown("### 💸 OpenAI Usage & Budgets")
+    store = get_usage_store()
+    if store is None:
+        st.caption("Disabled")
+        return
+    today = store.totals(days=1, group_by=("repo",))
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Calls today", sum(row["calls"] for row in today))
+    col2.metric("Tokens today", sum(row["input_tokens"] + row["output_tokens"] for row in today))
+    col3.metric("Estimated cost today", f"${sum(row['cost_usd'] for row in today):,.4f}")
+
+    budgets = store.budgets_today()
+    if budgets:
+        st.markdown("**Daily budgets (UTC)**")
+        st.dataframe(pd.DataFrame(budgets), use_container_width=True)
+
+    totals = store.totals(days=7)
+    if not totals:
+        st.caption("No model calls recorded in the last 7 days")
+        return
+    df = pd.DataFrame(totals)
+    st.plotly_chart(
+        px.bar(df.groupby(["day", "caller"], as_index=False)["cost_usd"].sum(), x="day", y="cost_usd",
+               color="caller", title="Estimated cost per day by caller (USD)"),
+        use_container_width=True
+    )
+    by_repo = df.groupby(["repo", "caller", "model"], dropna=False, as_index=False).agg(
+        calls=("calls", "sum"), input_tokens=("input_tokens", "sum"), output_tokens=("output_tokens", "sum"),
+        cost_usd=("cost_usd", "sum")
+    ).sort_values("cost_usd", ascending=False)
+    st.dataframe(by_repo, use_container_width=True)
+
 
 def render_admin_tab():
     st.title("📊 Admin Metrics Dashboard")
@@ -155,3 +245,8 @@ def render_admin_tab():
             </ul>
             </div>
             """, unsafe_allow_html=True)
+
+    render_cache_stats()
+    render_diff_filter_stats()
+    render_rate_limit_stats()
+    render_usage_stats()
@@ -1,32 +1,339 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import openai
 import os
+import json
+import time
+import random
+import asyncio
 import httpx
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from diff_chunker import chunk_budget, chunk_diff
+from diff_filter import DIFF_FILTER_ENABLED, filter_diff
+from llm_cache import get_llm_cache, llm_cache_key
+from llm_scheduler import get_scheduler
+from telemetry import stage, record_openai_usage
+from token_utils import estimate_tokens
+from usage_store import DEGRADED_MODEL, BudgetExceeded, get_usage_store
 
 api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key, http_client=httpx.Client(verify=False))
+# Retries are handled below so that a 429 pauses every caller through the shared scheduler.
+# OPENAI_BASE_URL (read by the SDK) can point both clients at a local fake server.
+client = OpenAI(api_key=api_key, http_client=httpx.Client(verify=False), max_retries=0)
+_async_client = None
 
-def summarize_diff(diff_text):
-    prompt = f"Summarize this GitHub PR diff:\n{diff_text[:10000]}"  # Truncate if needed
+MODEL = "gpt-4o"
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+# Output tokens reserved per request before the real usage is known
+EXPECTED_OUTPUT_TOKENS = int(os.getenv("OPENAI_EXPECTED_OUTPUT_TOKENS", "400"))
+# How many chunk (map) calls are in flight at once across the whole process
+MAP_CONCURRENCY = int(os.getenv("OPENAI_MAP_CONCURRENCY", "4"))
+# Diffs up to this many tokens (after filtering) are summarized together in one request
+BATCH_DIFF_TOKENS = int(os.getenv("OPENAI_BATCH_DIFF_TOKENS", "600"))
+# Prompt tokens and diffs per batched request, and how long a batch waits for more diffs
+BATCH_MAX_TOKENS = int(os.getenv("OPENAI_BATCH_MAX_TOKENS", "6000"))
+BATCH_MAX_ITEMS = int(os.getenv("OPENAI_BATCH_MAX_ITEMS", "12"))
+BATCH_LINGER_SECONDS = float(os.getenv("OPENAI_BATCH_LINGER_SECONDS", "0.3"))
 
-    response = client.responses.create(
-        model="gpt-4o",
-        instructions="You're a senior engineer summarizing GitHub PRs in couple of sentences for functional team purpose, Be concise and helpful.",
-        input=prompt,
-    )
-    return response.output_text
+SUMMARY_INSTRUCTIONS = "You're a senior engineer summarizing GitHub PRs in couple of sentences for functional team purpose, Be concise and helpful."
+RELEASE_NOTES_INSTRUCTIONS = "You're a senior engineer summarizing all PR summaries into a release notes in bullet points for manager purpose, Be concise and helpful."
+REVIEW_INSTRUCTIONS = "You are a lead software engineer. Review the following GitHub PR diff."
 
-def summarize_all_prs(diff_text):
-    prompt = f"Summarize this GitHub PR diff:\n{diff_text[:40000]}"  # Truncate if needed
+# Structured output of a batched summary: one entry per PR id of the prompt
+_BATCH_FORMAT = {
+    "type": "json_schema",
+    "name": "pr_summaries",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "summaries": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"id": {"type": "string"}, "summary": {"type": "string"}},
+                    "required": ["id", "summary"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["summaries"],
+        "additionalProperties": False,
+    },
+}
 
-    response = client.responses.create(
-        model="gpt-4o",
-        instructions="You're a senior engineer summarizing all PR summaries into a release notes in bullet points for manager purpose, Be concise and helpful.",
-        input=prompt,
-    )
+_RETRYABLE = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+# Shared by every map-reduce and release-note reduction, so concurrent large PRs do
+# not each fan out MAP_CONCURRENCY calls; asyncio semaphores are per event loop
+_map_slots = threading.BoundedSemaphore(MAP_CONCURRENCY)
+_amap_slots = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=api_key, http_client=httpx.AsyncClient(verify=False), max_retries=0)
+    return _async_client
+
+
+def _get_amap_slots():
+    loop = asyncio.get_running_loop()
+    if loop not in _amap_slots:
+        _amap_slots[loop] = asyncio.Semaphore(MAP_CONCURRENCY)
+    return _amap_slots[loop]
+
+
+def _retry_delay(error, attempt):
+    response = getattr(error, "response", None)
+    if response is not None:
+        if response.headers.get("retry-after-ms"):
+            return float(response.headers["retry-after-ms"]) / 1000
+        if response.headers.get("retry-after"):
+            try:
+                return float(response.headers["retry-after"])
+            except ValueError:
+                pass
+    return min(60, 2 ** attempt) + random.uniform(0, 1)
+
+
+def _estimate_request(instructions, prompt):
+    return estimate_tokens(instructions) + estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+
+
+def _settle(estimated, response):
+    if getattr(response, "usage", None) is not None:
+        get_scheduler().settle(estimated, response.usage.total_tokens)
+        record_openai_usage(response)
+
+
+def _create(model, instructions, prompt, **options):
+    scheduler = get_scheduler()
+    estimated = _estimate_request(instructions, prompt)
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        scheduler.acquire(estimated)
+        try:
+            with stage("openai_request", model=model):
+                response = client.responses.create(model=model, instructions=instructions, input=prompt, **options)
+        except _RETRYABLE as e:
+            if attempt == OPENAI_MAX_RETRIES:
+                raise
+            scheduler.pause(_retry_delay(e, attempt))
+            continue
+        _settle(estimated, response)
+        return response
+
+
+async def _acreate(model, instructions, prompt):
+    scheduler = get_scheduler()
+    estimated = _estimate_request(instructions, prompt)
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        await scheduler.acquire_async(estimated)
+        try:
+            with stage("openai_request", model=model):
+                response = await get_async_client().responses.create(
+                    model=model, instructions=instructions, input=prompt
+                )
+        except _RETRYABLE as e:
+            if attempt == OPENAI_MAX_RETRIES:
+                raise
+            scheduler.pause(_retry_delay(e, attempt))
+            continue
+        _settle(estimated, response)
+        return response
+
+
+def _create_stream(model, instructions, prompt, on_delta):
+    """
+    Streams the answer, passing each text delta to on_delta; returns the full text
+    and the token usage of the completed response.
+    """
+    scheduler = get_scheduler()
+    estimated = _estimate_request(instructions, prompt)
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        scheduler.acquire(estimated)
+        parts, usage = [], None
+        try:
+            with stage("openai_request", model=model, stream=True):
+                stream = client.responses.create(model=model, instructions=instructions, input=prompt, stream=True)
+                for event in stream:
+                    if event.type == "response.output_text.delta":
+                        parts.append(event.delta)
+                        on_delta(event.delta)
+                    elif event.type == "response.completed":
+                        _settle(estimated, event.response)
+                        usage = getattr(event.response, "usage", None)
+                    elif event.type == "response.failed":
+                        error = getattr(event.response, "error", None)
+                        raise RuntimeError(f"Response failed: {getattr(error, 'message', 'unknown error')}")
+        except _RETRYABLE as e:
+            # Once part of the answer has been shown, a retry would repeat it
+            if parts or attempt == OPENAI_MAX_RETRIES:
+                raise
+            scheduler.pause(_retry_delay(e, attempt))
+            continue
+        return "".join(parts), usage
+
+
+def _usage(operation, repo=None, pr_number=None, caller=None):
+    # Who a model call is made for, as recorded in the usage store
+    return {"operation": operation, "repo": repo, "pr_number": pr_number, "caller": caller}
+
+
+def _record_usage(usage, model, response_usage, latency, share=1.0):
+    store = get_usage_store()
+    if store is None or usage is None or response_usage is None:
+        return
+    store.record(model, round(response_usage.input_tokens * share), round(response_usage.output_tokens * share),
+                 latency, **usage)
+
+
+def _budget_mode(usage):
+    """
+    Today's UsageStore.budget_mode of usage["repo"]. Read once per top-level call and
+    passed down to all of its chunk and reduce calls.
+    """
+    store = get_usage_store()
+    repo = usage["repo"] if usage else None
+    if store is None or not repo:
+        return "full"
+    return store.budget_mode(repo)
+
+
+def _budget_model(usage, model, mode):
+    """
+    The model a new call may use in budget `mode`: `model` while the repo is under its
+    daily budget, DEGRADED_MODEL close to it. Raises BudgetExceeded once it is spent.
+    """
+    if mode == "skip":
+        store = get_usage_store()
+        raise BudgetExceeded(f"{usage['repo']} has spent its daily OpenAI budget of ${store.budget(usage['repo']):.2f}")
+    return DEGRADED_MODEL if mode == "degraded" else model
+
+
+def _cached(cache, model, instructions, prompt):
+    return cache.get(llm_cache_key(model, instructions, prompt)) if cache is not None else None
+
+
+def _respond(instructions, prompt, model=MODEL, use_cache=True, on_delta=None, usage=None, mode="full"):
+    # Identical (model, instructions, prompt) always maps to the same cached answer.
+    # use_cache=False skips the lookup only: the fresh answer still replaces the cached one
+    cache = get_llm_cache()
+    readable = cache if use_cache else None
+    cached = _cached(readable, model, instructions, prompt)
+    if cached is None:
+        # Cached answers are free; the repo's budget only gates new calls
+        budget_model = _budget_model(usage, model, mode)
+        if budget_model != model:
+            model = budget_model
+            cached = _cached(readable, model, instructions, prompt)
+    if cached is not None:
+        if on_delta is not None:
+            on_delta(cached)
+        return cached
+
+    started = time.monotonic()
+    if on_delta is None:
+        response = _create(model, instructions, prompt)
+        text, response_usage = response.output_text, response.usage
+    else:
+        text, response_usage = _create_stream(model, instructions, prompt, on_delta)
+    _record_usage(usage, model, response_usage, time.monotonic() - started)
+    if cache is not None:
+        cache.put(llm_cache_key(model, instructions, prompt), model, text)
+        stats = cache.stats()
+        print(f"llm cache miss ({time.monotonic() - started:.1f}s) - hits: {stats['hits']}, misses: {stats['misses']}")
+    return text
+
+
+async def _arespond(instructions, prompt, model=MODEL, use_cache=True, usage=None, mode="full"):
+    cache = get_llm_cache()
+    readable = cache if use_cache else None
+    cached = _cached(readable, model, instructions, prompt)
+    if cached is None:
+        budget_model = _budget_model(usage, model, mode)
+        if budget_model != model:
+            model = budget_model
+            cached = _cached(readable, model, instructions, prompt)
+    if cached is not None:
+        return cached
+
+    started = time.monotonic()
+    response = await _acreate(model, instructions, prompt)
+    _record_usage(usage, model, response.usage, time.monotonic() - started)
+    if cache is not None:
+        cache.put(llm_cache_key(model, instructions, prompt), model, response.output_text)
     return response.output_text
 
-def review_pr(diff_text):
-    prompt = f"""
+
+def _map_reduce(text, instructions, single_prompt, part_prompt, combine_prompt, model, use_cache, on_delta=None,
+                usage=None, mode="full"):
+    """
+    Sends `text` in one call when it fits the model's chunk budget. Otherwise the
+    chunks are processed in parallel (at most MAP_CONCURRENCY chunk calls in the
+    whole process) and the partial answers combined, recursively
+    if the partial answers themselves do not fit. Only the final answer is streamed
+    to on_delta.
+    """
+    budget = chunk_budget(model)
+    chunks = chunk_diff(text, budget)
+    if len(chunks) == 1:
+        return _respond(instructions, single_prompt(text), model, use_cache, on_delta, usage, mode)
+
+    def run(item):
+        index, chunk = item
+        with _map_slots:
+            return _respond(instructions, part_prompt(chunk, index + 1, len(chunks)), model, use_cache,
+                            usage=usage, mode=mode)
+
+    with ThreadPoolExecutor(max_workers=min(len(chunks), MAP_CONCURRENCY)) as pool:
+        partials = list(pool.map(run, enumerate(chunks)))
+    combined = "\n\n".join(partials)
+    if len(chunk_diff(combined, budget)) >= len(chunks):
+        # The partial answers do not shrink any further; combine them in one call
+        return _respond(instructions, combine_prompt(combined), model, use_cache, on_delta, usage, mode)
+    return _map_reduce(combined, instructions, combine_prompt, lambda chunk, i, n: combine_prompt(chunk),
+                       combine_prompt, model, use_cache, on_delta, usage, mode)
+
+
+async def _amap_reduce(text, instructions, single_prompt, part_prompt, combine_prompt, model, use_cache, usage=None,
+                       mode="full"):
+    budget = chunk_budget(model)
+    chunks = chunk_diff(text, budget)
+    if len(chunks) == 1:
+        return await _arespond(instructions, single_prompt(text), model, use_cache, usage, mode)
+
+    slots = _get_amap_slots()
+
+    async def run(index, chunk):
+        async with slots:
+            return await _arespond(instructions, part_prompt(chunk, index + 1, len(chunks)), model, use_cache,
+                                   usage, mode)
+
+    partials = await asyncio.gather(*[run(index, chunk) for index, chunk in enumerate(chunks)])
+    combined = "\n\n".join(partials)
+    if len(chunk_diff(combined, budget)) >= len(chunks):
+        return await _arespond(instructions, combine_prompt(combined), model, use_cache, usage, mode)
+    return await _amap_reduce(combined, instructions, combine_prompt, lambda chunk, i, n: combine_prompt(chunk),
+                              combine_prompt, model, use_cache, usage, mode)
+
+
+def _summary_prompt(diff_text):
+    return f"Summarize this GitHub PR diff:\n{diff_text}"
+
+def _summary_part_prompt(chunk, index, total):
+    return f"Summarize part {index} of {total} of this GitHub PR diff:\n{chunk}"
+
+def _summary_combine_prompt(partials):
+    return f"Combine these summaries of the parts of one GitHub PR diff into a single summary:\n{partials}"
+
+def _release_notes_combine_prompt(partials):
+    return f"Merge these partial release notes into a single release note:\n{partials}"
+
+def _review_prompt(diff_text):
+    return f"""
         Your task:
         - Identify code quality issues (style, structure, edge cases, security, etc.)
         - Give specific improvement suggestions
@@ -36,10 +343,238 @@ def review_pr(diff_text):
         PR diff:\n{diff_text}
         """
 
-    response = client.responses.create(
-        model="gpt-4o",
-        instructions="You are a lead software engineer. Review the following GitHub PR diff.",
-        input=prompt,
+def _review_part_prompt(chunk, index, total):
+    return f"This is part {index} of {total} of the PR diff.\n" + _review_prompt(chunk)
+
+def _review_combine_prompt(partials):
+    return (
+        "Merge these reviews of the parts of one GitHub PR diff into a single review. "
+        "Keep the most important issues, be concise and write in 3 sentences:\n"
+        f"{partials}"
     )
-    # print(response.output_text)
-    return response.output_text
+
+_SUMMARY = (SUMMARY_INSTRUCTIONS, _summary_prompt, _summary_part_prompt, _summary_combine_prompt)
+_REVIEW = (REVIEW_INSTRUCTIONS, _review_prompt, _review_part_prompt, _review_combine_prompt)
+
+def _filter(diff_text, repo=None, pr_number=None):
+    # Lockfiles, generated and binary files cost tokens without helping the summary
+    if not DIFF_FILTER_ENABLED:
+        return diff_text
+    filtered, report = filter_diff(diff_text)
+    if report:
+        label = f"{repo}#{pr_number}" if repo and pr_number else repo or "PR"
+        details = ", ".join(
+            f"{rule}: {saved['files']} file(s), {saved['bytes']} bytes, ~{saved['tokens']} tokens"
+            for rule, saved in report.items()
+        )
+        print(f"diff filter {label} - {details}")
+    return filtered
+
+def summarize_diff(diff_text, use_cache=True, model=MODEL, repo=None, pr_number=None, on_delta=None, caller=None):
+    usage = _usage("summary", repo, pr_number, caller)
+    return _map_reduce(_filter(diff_text, repo, pr_number), *_SUMMARY, model, use_cache, on_delta, usage,
+                       _budget_mode(usage))
+
+def _batch_prompt(texts):
+    diffs = "\n\n".join(f"### PR {index}\n{text}" for index, text in enumerate(texts, 1))
+    return (
+        "Summarize each of these GitHub PR diffs separately. Answer with one entry per PR, "
+        f"using the number of its '### PR' heading as id:\n\n{diffs}"
+    )
+
+def _summarize_batch(texts, model=MODEL, usages=None):
+    """
+    Summarizes several small (already filtered) diffs in one structured-output call.
+    Returns one summary per diff, None where the model gave none or the call failed.
+    The call's tokens are recorded against each diff's usage tag by its share of the prompt.
+    """
+    try:
+        started = time.monotonic()
+        response = _create(model, SUMMARY_INSTRUCTIONS, _batch_prompt(texts), text={"format": _BATCH_FORMAT})
+        latency = time.monotonic() - started
+        sizes = [estimate_tokens(text) for text in texts]
+        for usage, size in zip(usages or [], sizes):
+            _record_usage(usage, model, response.usage, latency, size / (sum(sizes) or 1))
+        answers = json.loads(response.output_text)["summaries"]
+        by_id = {str(answer["id"]).strip(): answer["summary"] for answer in answers if answer.get("summary")}
+    except Exception as e:
+        print(f"⚠️ Batched summary of {len(texts)} PR(s) failed, summarizing them one by one: {e}")
+        return [None] * len(texts)
+
+    summaries = [by_id.get(str(index)) for index in range(1, len(texts) + 1)]
+    # Cached under the single-PR key, so later single calls for the same diff hit the cache
+    cache = get_llm_cache()
+    if cache is not None:
+        for text, summary in zip(texts, summaries):
+            if summary is not None:
+                cache.put(llm_cache_key(model, SUMMARY_INSTRUCTIONS, _summary_prompt(text)), model, summary)
+    print(f"batched summary - {sum(summary is not None for summary in summaries)}/{len(texts)} PR(s) in one request")
+    return summaries
+
+def _pack(texts, max_tokens=BATCH_MAX_TOKENS, max_items=BATCH_MAX_ITEMS):
+    # Greedy: fill a batch in order until the next diff would exceed the budget
+    batches, batch, tokens = [], [], 0
+    for item_id, text in texts:
+        size = estimate_tokens(text)
+        if batch and (tokens + size > max_tokens or len(batch) >= max_items):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append((item_id, text))
+        tokens += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class SummaryBatcher:
+    """
+    Lets many threads share batched summary requests: summarize() queues a small
+    diff and blocks until its batch is answered. A batch is sent once it reaches
+    max_tokens or max_items, or `linger` seconds after its first diff arrived.
+    A batch of one, and diffs the batch left unanswered, fall back to a single call,
+    as do diffs of repos whose daily budget has moved them to DEGRADED_MODEL.
+
+    `slot` (e.g. a semaphore bounding model calls) is held while a batch request
+    is sent and around the fallback call, but not while waiting for the batch.
+    """
+
+    def __init__(self, use_cache=True, model=MODEL, max_tokens=BATCH_MAX_TOKENS, max_items=BATCH_MAX_ITEMS,
+                 linger=BATCH_LINGER_SECONDS, caller=None):
+        self.use_cache = use_cache
+        self.model = model
+        self.caller = caller
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.linger = linger
+        self._pending = []
+        self._tokens = 0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def accepts(self, diff_text):
+        # Filtering only shrinks a diff, so the raw size is a safe check
+        return estimate_tokens(diff_text) <= BATCH_DIFF_TOKENS
+
+    def _take(self):
+        batch, self._pending, self._tokens = self._pending, [], 0
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _send(self, batch):
+        summaries = [None] * len(batch)
+        try:
+            if len(batch) > 1:
+                # Callers of one run share the same slot, so the first one bounds the request
+                with batch[0][2] or nullcontext():
+                    summaries = _summarize_batch([text for text, _, _, _ in batch], self.model,
+                                                 [usage for _, usage, _, _ in batch])
+        finally:
+            for (_, _, _, future), summary in zip(batch, summaries):
+                future.set_result(summary)
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _submit(self, text, usage, slot):
+        future = Future()
+        size = estimate_tokens(text)
+        ready = []
+        with self._lock:
+            if self._pending and self._tokens + size > self.max_tokens:
+                ready.append(self._take())
+            self._pending.append((text, usage, slot, future))
+            self._tokens += size
+            if len(self._pending) >= self.max_items or self._tokens >= self.max_tokens:
+                ready.append(self._take())
+            elif self._timer is None:
+                self._timer = threading.Timer(self.linger, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        for batch in ready:
+            self._send(batch)
+        return future.result()
+
+    def summarize(self, diff_text, repo=None, pr_number=None, on_delta=None, slot=None):
+        text = _filter(diff_text, repo, pr_number)
+        usage = _usage("summary", repo, pr_number, self.caller)
+        cache = get_llm_cache() if self.use_cache else None
+        summary = _cached(cache, self.model, SUMMARY_INSTRUCTIONS, _summary_prompt(text))
+        mode = "full" if summary is not None else _budget_mode(usage)
+        if summary is None and mode == "full":
+            summary = self._submit(text, usage, slot)
+        if summary is None:
+            with slot or nullcontext():
+                return _map_reduce(text, *_SUMMARY, self.model, self.use_cache, on_delta, usage, mode)
+        if on_delta is not None:
+            on_delta(summary)
+        return summary
+
+def _release_notes_batch_prompt(summaries):
+    return f"Write release notes from these GitHub PR summaries:\n{summaries}"
+
+def _org_release_notes_prompt(repo_notes):
+    return (
+        "Combine these per-repository release notes into one organization-wide release note. "
+        f"Group related changes across repositories and name the repository of each change:\n{repo_notes}"
+    )
+
+def _reduce(items, prompt, model, use_cache, on_delta=None, budget=None, usage=None, mode="full"):
+    """
+    Tree reduction: packs whole items into batches of up to `budget` tokens, reduces
+    the batches in parallel and recurses on the partial release notes until one
+    call covers everything. Only that final call is streamed to on_delta.
+    """
+    budget = budget or chunk_budget(model)
+    batches = _pack(list(enumerate(items)), budget, max_items=len(items))
+    if len(batches) == 1:
+        return _respond(RELEASE_NOTES_INSTRUCTIONS, prompt("\n\n".join(items)), model, use_cache, on_delta, usage,
+                        mode)
+
+    def run(batch):
+        with _map_slots:
+            return _respond(RELEASE_NOTES_INSTRUCTIONS, prompt("\n\n".join(text for _, text in batch)), model,
+                            use_cache, usage=usage, mode=mode)
+
+    with ThreadPoolExecutor(max_workers=min(len(batches), MAP_CONCURRENCY)) as workers:
+        partials = list(workers.map(run, batches))
+    if len(_pack(list(enumerate(partials)), budget, max_items=len(partials))) >= len(batches):
+        # The partial notes do not pack any tighter; merge them in one call
+        return _respond(RELEASE_NOTES_INSTRUCTIONS, _release_notes_combine_prompt("\n\n".join(partials)),
+                        model, use_cache, on_delta, usage, mode)
+    return _reduce(partials, _release_notes_combine_prompt, model, use_cache, on_delta, budget, usage, mode)
+
+def summarize_release_notes(summaries, use_cache=True, model=MODEL, on_delta=None, repo=None, caller=None):
+    """
+    Release notes of one repo from its PR summaries, however many there are.
+    """
+    summaries = [summary for summary in summaries if summary]
+    if not summaries:
+        return None
+    usage = _usage("release_notes", repo, caller=caller)
+    return _reduce(summaries, _release_notes_batch_prompt, model, use_cache, on_delta, usage=usage,
+                   mode=_budget_mode(usage))
+
+def summarize_org_release_notes(repo_notes, use_cache=True, model=MODEL, on_delta=None, caller=None):
+    """
+    One organization-wide release note from {repo: release notes}.
+    """
+    items = [f"## {repo}\n{notes}" for repo, notes in repo_notes.items() if notes]
+    if not items:
+        return None
+    return _reduce(items, _org_release_notes_prompt, model, use_cache, on_delta,
+                   usage=_usage("org_release_notes", caller=caller))
+
+def review_pr(diff_text, use_cache=True, model=MODEL, repo=None, pr_number=None, on_delta=None, caller=None):
+    usage = _usage("review", repo, pr_number, caller)
+    return _map_reduce(_filter(diff_text, repo, pr_number), *_REVIEW, model, use_cache, on_delta, usage,
+                       _budget_mode(usage))
+
+async def areview_pr(diff_text, use_cache=True, model=MODEL, repo=None, pr_number=None, caller=None):
+    usage = _usage("review", repo, pr_number, caller)
+    return await _amap_reduce(_filter(diff_text, repo, pr_number), *_REVIEW, model, use_cache, usage,
+                              _budget_mode(usage))
@@ -1,14 +1,20 @@
 import streamlit as st
 import pandas as pd
 import os
+import queue
 from datetime import datetime, timezone, timedelta
 from admin_dashboard import render_admin_tab
 from dotenv import load_dotenv
 import plotly.express as px
 import plotly.graph_objects as go
-from github_utils import fetch_prs, get_diff, fetch_org_repos, fetch_codeql_alerts
-from ai_summarizer import summarize_diff, review_pr, summarize_all_prs
+from github_utils import fetch_org_repos, fetch_codeql_alerts
+from github_rate_limit import get_governor, wait_listener
+from ai_summarizer import summarize_diff, review_pr, summarize_org_release_notes, SummaryBatcher
 from metrics_utils import analyze_pr_metrics, add_pr_analytics
+from pipeline import process_prs, summarize_repos
+from pr_warehouse import get_warehouse, sync_repos
+from pr_frame import pr_views
+from usage_store import get_usage_store, DEGRADED_MODEL
 import textwrap
 
 # Load environment variables and configure page
@@ -144,6 +150,72 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# The org's repository list is cached across reruns; the sidebar multiselect filters it locally
+REPO_INDEX_TTL_SECONDS = int(os.getenv("REPO_INDEX_TTL_SECONDS", "3600"))
+
+@st.cache_data(ttl=REPO_INDEX_TTL_SECONDS, show_spinner=False)
+def load_repo_index(org, token):
+    return sorted(fetch_org_repos(org, token), key=str.lower)
+
+def rate_limit_message(status):
+    return f"⏳ Waiting for GitHub rate limit ({status['reason']}), resuming in {status['seconds']}s"
+
+def show_budget_notices(repos):
+    # Repos near or over their daily OpenAI budget, so missing or shorter answers are explained
+    store = get_usage_store()
+    if store is None:
+        return
+    for repo in repos:
+        mode = store.budget_mode(repo)
+        if mode == "skip":
+            st.warning(f"💸 {repo} has spent its daily OpenAI budget; its new PRs were skipped until tomorrow (UTC)")
+        elif mode == "degraded":
+            st.info(f"💸 {repo} is close to its daily OpenAI budget; new answers use {DEGRADED_MODEL}")
+
+def stream_prs(repos, state, analyze, unavailable, **kwargs):
+    """
+    Runs pipeline.process_prs with analyze(repo, pr, diff, on_delta), showing a card per
+    PR that fills in as the model streams and is finalized as soon as the PR is done.
+    Streamlit calls must stay on this thread, so workers only queue the deltas.
+
+    Returns (results, errors, holder); holder.empty() removes the live cards.
+    """
+    deltas = queue.Queue()
+    holder = st.empty()
+    box = holder.container()
+    cards, texts = {}, {}
+
+    def card(repo, pr):
+        key = (repo, pr['number'])
+        if key not in cards:
+            cards[key] = box.empty()
+            texts[key] = ""
+        return key
+
+    def render(repo, pr, text):
+        cards[(repo, pr['number'])].markdown(f"**{repo} #{pr['number']} - {pr['title']}**\n\n{text}")
+
+    def drain():
+        changed = {}
+        while not deltas.empty():
+            repo, pr, text = deltas.get()
+            texts[card(repo, pr)] += text
+            changed[(repo, pr['number'])] = (repo, pr)
+        for key, (repo, pr) in changed.items():
+            render(repo, pr, texts[key] + "▌")
+
+    def finish(repo, pr, output):
+        drain()
+        card(repo, pr)
+        render(repo, pr, output if output is not None else unavailable)
+
+    results, errors = process_prs(
+        repos, token, since.isoformat(), until.isoformat(), state,
+        lambda repo, pr, diff: analyze(repo, pr, diff, lambda text: deltas.put((repo, pr, text))),
+        list_prs=warehouse.query_prs, on_result=finish, on_poll=drain, **kwargs
+    )
+    return results, errors, holder
+
 # Initialize session state variables if they don't exist
 if 'open_prs' not in st.session_state:
     st.session_state.open_prs = []
@@ -151,8 +223,12 @@ if 'merged_prs' not in st.session_state:
     st.session_state.merged_prs = []
 if 'repo_summaries' not in st.session_state:
     st.session_state.repo_summaries = []
+if 'org_summary' not in st.session_state:
+    st.session_state.org_summary = None
 if 'metrics_df' not in st.session_state:
     st.session_state.metrics_df = None
+if 'pr_views' not in st.session_state:
+    st.session_state.pr_views = None
 if 'alerts' not in st.session_state:
     st.session_state.alerts = {}
 
@@ -188,10 +264,17 @@ with st.sidebar:
     # Repository selection
     st.markdown("### Repositories")
     if org and token:
+        if st.button("🔄 Refresh repositories", help="Reload the repository list from GitHub"):
+            load_repo_index.clear()
         with st.spinner("Fetching repositories..."):
-            repo_names_list = fetch_org_repos(org, token)
+            try:
+                repo_names_list = load_repo_index(org, token)
+            except Exception as e:
+                st.error(f"Error fetching repositories for {org}: {e}")
+                repo_names_list = []
         
         if repo_names_list:
+            st.caption(f"{len(repo_names_list)} repositories, refreshed every {REPO_INDEX_TTL_SECONDS // 60} min")
             selected_repo_list = st.multiselect(
                 f"Select repositories from {org}", 
                 options=repo_names_list,
@@ -206,6 +289,45 @@ with st.sidebar:
         selected_repo_list = []
         st.info("Please provide GitHub organization and token")
     
+    # PRs are read from the local warehouse; only changes since the last sync come from GitHub
+    warehouse = get_warehouse()
+    if selected_repo_list:
+        st.markdown("### PR Warehouse")
+        force_sync = st.button("🔄 Sync now", help="Fetch PRs updated on GitHub since the last sync")
+        sync_status = st.empty()
+        # Reruns on a fresh warehouse only read sync state; GitHub is hit for stale repos only
+        stale_repos = [
+            repo for repo in selected_repo_list if force_sync or warehouse.needs_sync(repo, since.isoformat())
+        ]
+        synced, sync_errors = {}, {}
+        if stale_repos:
+            with st.spinner("Syncing PRs..."):
+                synced, sync_errors = sync_repos(
+                    stale_repos, token, since.isoformat(),
+                    on_wait=lambda status: sync_status.warning(rate_limit_message(status))
+                )
+            sync_status.empty()
+        if force_sync:
+            st.success(f"Synced {sum(synced.values())} updated PR(s)")
+        for repo, error in sync_errors.items():
+            st.error(f"Sync failed for {repo}: {error}")
+        freshness = warehouse.freshness(selected_repo_list)
+        for repo in selected_repo_list:
+            info = freshness.get(repo)
+            if info:
+                synced_at = datetime.fromtimestamp(info["synced_at"]).strftime("%Y-%m-%d %H:%M")
+                st.caption(f"{repo}: {info['prs']} PRs since {info['covered_since']}, synced {synced_at}")
+            else:
+                st.caption(f"{repo}: not synced yet")
+    
+    # AI settings
+    st.markdown("### AI Settings")
+    bypass_llm_cache = st.checkbox(
+        "Regenerate AI results",
+        value=False,
+        help="Ignore cached summaries/reviews and call the model again; the new results replace the cached ones"
+    )
+    
     # Help section
     with st.expander("ℹ️ Help"):
         st.markdown("""
@@ -258,57 +380,104 @@ with tab1:
     if st.button("Generate PR Summary", type="primary", use_container_width=True):
         all_merged_prs = []
         all_repos_summary = []
+        use_cache = not bypass_llm_cache
         
+        # Diffs and summaries run concurrently across PRs and repositories
+        progress_bar = st.progress(0, text="Fetching merged PRs...")
+        def show_progress(done, total):
+            waiting = get_governor().waiting() if get_governor() else None
+            text = f"Summarized {done}/{total} merged PR(s) found so far"
+            if waiting:
+                text += f" - {rate_limit_message(waiting)}"
+            progress_bar.progress(done / total if total else 0, text=text)
+        
+        # Summaries appear as they stream in; the cards below replace them once everything is done
+        results, errors, live = stream_prs(
+            selected_repo_list, "closed",
+            lambda repo, pr, diff, on_delta: summarize_diff(
+                diff, use_cache=use_cache, repo=repo, pr_number=pr['number'], on_delta=on_delta, caller="tab:merged"
+            ),
+            "⚠️ Summary unavailable for this PR.", on_progress=show_progress,
+            # Small diffs are summarized several per request
+            batcher=SummaryBatcher(use_cache=use_cache, caller="tab:merged")
+        )
+        
+        show_budget_notices(selected_repo_list)
+        repo_texts = {}
         for repo in selected_repo_list:
-            with st.spinner(f"Fetching merged PRs for {repo}..."):
-                prs = fetch_prs(repo, token, since.isoformat(), until.isoformat(), state="closed")
-                
-                if prs:
-                    st.success(f"Found {len(prs)} merged PR(s) in {repo}")
-                    
-                    progress_bar = st.progress(0)
-                    pr_data = []
-                    repo_summaries = ""
-                    for i, pr in enumerate(prs):
-                        with st.spinner(f"Summarizing PR #{pr['number']}..."):
-                            diff = get_diff(repo, pr['number'], token)
-                            summary = summarize_diff(diff)
-                            repo_summaries = repo_summaries+'\n'+summary
-                            merged_date = datetime.strptime(pr['merged_at'], "%Y-%m-%dT%H:%M:%SZ") if pr.get('merged_at') else None
-                            
-                            # Only include if the PR was actually merged
-                            if merged_date:
-                                pr_info = {
-                                    "Repository": repo,
-                                    "PR Number": pr['number'],
-                                    "Title": pr['title'],
-                                    "Author": pr['user']['login'],
-                                    "Merged At": merged_date,
-                                    "URL": pr['html_url'],
-                                    "Summary": summary,
-                                    "Additions": pr.get('additions', 0),
-                                    "Deletions": pr.get('deletions', 0)
-                                }
-                                pr_data.append(pr_info)
-                        
-                        # Update progress bar
-                        progress_bar.progress((i + 1) / len(prs))
-
-                    repo_summary = summarize_all_prs(repo_summaries)
-                    if repo_summary:
-                        repo_summary = {
-                            "Repository": repo,
-                            "summary":repo_summary
-                        }
-                    all_repos_summary.append(repo_summary)
-                    all_merged_prs.extend(pr_data)
+            if repo in errors:
+                st.error(f"Error fetching merged PRs for {repo}: {errors[repo]}")
+                continue
+            pr_data = []
+            repo_summaries = []
+            for pr, summary in results[repo]:
+                if summary is None:
+                    summary = "⚠️ Summary unavailable for this PR."
                 else:
-                    st.info(f"No merged PRs found for {repo} in the selected date range")
+                    repo_summaries.append(summary)
+                merged_date = datetime.strptime(pr['merged_at'], "%Y-%m-%dT%H:%M:%SZ") if pr.get('merged_at') else None
+                
+                # Only include if the PR was actually merged
+                if merged_date:
+                    pr_info = {
+                        "Repository": repo,
+                        "PR Number": pr['number'],
+                        "Title": pr['title'],
+                        "Author": pr['user']['login'],
+                        "Merged At": merged_date,
+                        "URL": pr['html_url'],
+                        "Summary": summary,
+                        "Additions": pr.get('additions', 0),
+                        "Deletions": pr.get('deletions', 0)
+                    }
+                    pr_data.append(pr_info)
+            
+            if pr_data:
+                st.success(f"Found {len(pr_data)} merged PR(s) in {repo}")
+                repo_texts[repo] = repo_summaries
+                all_merged_prs.extend(pr_data)
+            else:
+                st.info(f"No merged PRs found for {repo} in the selected date range")
         
+        # PR summaries are reduced in token-budgeted batches into repo notes, then across repos
+        with st.spinner("Writing release notes..."):
+            repo_notes = summarize_repos(repo_texts, use_cache=use_cache, caller="tab:merged")
+        for repo, repo_summary in repo_notes.items():
+            if repo_summary:
+                all_repos_summary.append({
+                    "Repository": repo,
+                    "summary":repo_summary
+                })
+            elif repo_summary is None:
+                # Failed or over the repo's daily OpenAI budget (see the notices above)
+                st.warning(f"⚠️ Release notes unavailable for {repo}.")
+        
+        org_summary = None
+        if len(all_repos_summary) > 1:
+            org_stream = st.empty()
+            streamed = []
+            def show_org_delta(text):
+                streamed.append(text)
+                org_stream.markdown("".join(streamed) + "▌")
+            with st.spinner("Writing organization release notes..."):
+                try:
+                    org_summary = summarize_org_release_notes(
+                        {row["Repository"]: row["summary"] for row in all_repos_summary},
+                        use_cache=use_cache, on_delta=show_org_delta, caller="tab:merged"
+                    )
+                except Exception as e:
+                    st.warning(f"⚠️ Organization release notes unavailable: {e}")
+            org_stream.empty()
+        
+        live.empty()
         st.session_state.merged_prs = all_merged_prs
         st.session_state.repo_summaries = all_repos_summary
+        st.session_state.org_summary = org_summary
     
-    # Display Overall release notes
+    # Display organization-wide and per-repo release notes
+    if st.session_state.org_summary:
+        st.markdown(f"## {org} Release Notes")
+        st.markdown(st.session_state.org_summary, unsafe_allow_html=True)
     if st.session_state.repo_summaries:
         st.markdown("## Overall Summary")
         df = pd.DataFrame(st.session_state.repo_summaries)
@@ -381,50 +550,63 @@ with tab2:
     
     if st.button("Review Open PRs", type="primary", use_container_width=True):
         all_open_prs = []
+        use_cache = not bypass_llm_cache
+        
+        progress_bar = st.progress(0, text="Fetching open PRs...")
+        def show_review_progress(done, total):
+            waiting = get_governor().waiting() if get_governor() else None
+            text = f"Reviewed {done}/{total} open PR(s) found so far"
+            if waiting:
+                text += f" - {rate_limit_message(waiting)}"
+            progress_bar.progress(done / total if total else 0, text=text)
+        
+        # Reviews stream into their cards while the remaining diffs are fetched and reviewed
+        results, errors, live = stream_prs(
+            selected_repo_list, "open",
+            lambda repo, pr, diff, on_delta: review_pr(
+                diff, use_cache=use_cache, repo=repo, pr_number=pr['number'], on_delta=on_delta, caller="tab:open"
+            ),
+            "⚠️ Review unavailable for this PR.", on_progress=show_review_progress
+        )
+        live.empty()
+        show_budget_notices(selected_repo_list)
         
         for repo in selected_repo_list:
-            with st.spinner(f"Fetching open PRs for {repo}..."):
-                open_prs = fetch_prs(repo, token, since.isoformat(), until.isoformat(), state="open")
+            if repo in errors:
+                st.error(f"Error fetching open PRs for {repo}: {errors[repo]}")
+                continue
+            pr_data = []
+            for pr, review_feedback in results[repo]:
+                if review_feedback is None:
+                    review_feedback = "⚠️ Review unavailable for this PR."
                 
-                if open_prs:
-                    st.success(f"Found {len(open_prs)} open PR(s) in {repo}")
-                    
-                    # progress_bar = st.progress(0)
-                    pr_data = []
-                    
-                    for i, pr in enumerate(open_prs):
-                        with st.spinner(f"Reviewing PR #{pr['number']}..."):
-                            diff = get_diff(repo, pr['number'], token)
-                            review_feedback = review_pr(diff)
-                            
-                            created_date = datetime.strptime(pr['created_at'], "%Y-%m-%dT%H:%M:%SZ")
-                            title = f"#{pr['number']} - {pr['title']}"
-                            metadata = (
-                                f"<strong>Repository:</strong> {repo}<br>"
-                                f"<strong>Author:</strong> {pr['user']['login']}<br>"
-                                f"<a href='{pr['html_url']}' target='_blank'>View PR</a>"
-                            )
-                            
-                            pr_info = {
-                                "Repository": repo,
-                                "PR Number": pr['number'],
-                                "Title": title,
-                                "Metadata": metadata,
-                                "Author": pr['user']['login'],
-                                "Created At": created_date,
-                                "URL": pr['html_url'],
-                                "Review": review_feedback
-                                # "Additions": pr.get('additions', 0),
-                                # "Deletions": pr.get('deletions', 0)
-                            }
-                            pr_data.append(pr_info)
-                        
-                        # Update progress bar
-                        # progress_bar.progress((i + 1) / len(open_prs))
-                    
-                    all_open_prs.extend(pr_data)
-                else:
-                    st.info(f"No open PRs found for {repo} in the selected date range")
+                created_date = datetime.strptime(pr['created_at'], "%Y-%m-%dT%H:%M:%SZ")
+                title = f"#{pr['number']} - {pr['title']}"
+                metadata = (
+                    f"<strong>Repository:</strong> {repo}<br>"
+                    f"<strong>Author:</strong> {pr['user']['login']}<br>"
+                    f"<a href='{pr['html_url']}' target='_blank'>View PR</a>"
+                )
+                
+                pr_info = {
+                    "Repository": repo,
+                    "PR Number": pr['number'],
+                    "Title": title,
+                    "Metadata": metadata,
+                    "Author": pr['user']['login'],
+                    "Created At": created_date,
+                    "URL": pr['html_url'],
+                    "Review": review_feedback
+                    # "Additions": pr.get('additions', 0),
+                    # "Deletions": pr.get('deletions', 0)
+                }
+                pr_data.append(pr_info)
+            
+            if pr_data:
+                st.success(f"Found {len(pr_data)} open PR(s) in {repo}")
+                all_open_prs.extend(pr_data)
+            else:
+                st.info(f"No open PRs found for {repo} in the selected date range")
         
         st.session_state.open_prs = all_open_prs
     
@@ -573,11 +755,17 @@ with tab3:
         with st.spinner(f"Fetching and analyzing {pr_state_option.lower()} PRs..."):
             for repo in selected_repo_list:
                 try:
-                    prs = fetch_prs(repo, token, since.isoformat(), until.isoformat(), state=pr_state)
+                    prs = warehouse.query_prs(repo, since.isoformat(), until.isoformat(), pr_state)
+                    # Details, comments and reviews were stored by the warehouse sync
+                    enrichment = warehouse.load_enrichment(repo, prs)
+                    prs = add_pr_analytics(repo, prs, enrichment)
                     if prs:
-                        prs = add_pr_analytics(repo, prs)
+                        degraded = [pr["number"] for pr in prs if pr.get("metrics_error")]
+                        if degraded:
+                            st.warning(f"Metrics unavailable for {len(degraded)} PR(s) in {repo}: "
+                                       + ", ".join(f"#{number}" for number in degraded))
                         all_prs.extend(prs)
-                        df = analyze_pr_metrics(repo, prs)
+                        df = analyze_pr_metrics(repo, prs, enrichment=enrichment)
                         df["Repository"] = repo
                         df["PR Link"] = df["PR Number"].apply(
                             lambda pr: f"<a href='https://github.com/{repo}/pull/{pr}' target='_blank'>#{pr}</a>"
@@ -587,8 +775,8 @@ with tab3:
                     st.error(f"Error analyzing {repo}: {e}")
         
         if all_prs:
-            # Add analytics data
-            st.session_state.all_prs = all_prs
+            # Typed PR frame and everything derived from it, built once per fetch
+            st.session_state.pr_views = pr_views(all_prs)
             
             if all_metrics:
                 full_df = pd.concat(all_metrics, ignore_index=True)
@@ -597,39 +785,9 @@ with tab3:
             st.warning(f"No {pr_state_option.lower()} PRs found for the selected repositories in this date range.")
     
     # Display metrics if available
-    if hasattr(st.session_state, 'all_prs') and st.session_state.all_prs:
-        all_prs = st.session_state.all_prs
-        
-        # Calculate metrics
-        merged_prs = [pr for pr in all_prs if pr.get("merged_at")]
-        open_prs = [pr for pr in all_prs if pr.get("state") == "open"]
-        closed_not_merged_prs = [
-            pr for pr in all_prs
-            if pr.get("state") == "closed" and not pr.get("merged_at")
-        ]
-        
-        # Calculate review durations for merged PRs
-        review_durations = [
-            (pd.to_datetime(pr["merged_at"]) - pd.to_datetime(pr["created_at"])).total_seconds() / 3600
-            for pr in all_prs if pr.get("merged_at") and pr.get("created_at")
-        ]
-        avg_duration = sum(review_durations) / len(review_durations) if review_durations else 0
-        
-        # Calculate average PR size
-        avg_size = sum(
-            pr.get("additions", 0) + pr.get("deletions", 0) for pr in all_prs
-        ) / len(all_prs) if all_prs else 0
-        
-        # Calculate average comments per PR
-        comments_per_pr = [
-            pr.get("comments", 0) + pr.get("review_comments", 0) for pr in all_prs
-        ]
-        avg_comments = sum(comments_per_pr) / len(comments_per_pr) if comments_per_pr else 0
-        
-        # Calculate PRs merged without comments
-        pr_no_comments = [
-            pr for pr in all_prs if pr.get("merged_at") and pr.get("review_comments", 0) == 0
-        ]
+    if st.session_state.pr_views is not None:
+        views = st.session_state.pr_views
+        summary = views["summary"]
         
         # Display metrics in a nice dashboard style
         st.markdown("<h3 class='subheader'>📈 PR Summary</h3>", unsafe_allow_html=True)
@@ -639,28 +797,28 @@ with tab3:
         with col1:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value">{len(all_prs)}</div>
+                <div class="metric-value">{summary['total']}</div>
                 <div class="metric-label">Total PRs</div>
             </div>
             """, unsafe_allow_html=True)
         with col2:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value">{len(open_prs)}</div>
+                <div class="metric-value">{summary['open']}</div>
                 <div class="metric-label">Open PRs</div>
             </div>
             """, unsafe_allow_html=True)
         with col3:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value">{len(merged_prs)}</div>
+                <div class="metric-value">{summary['merged']}</div>
                 <div class="metric-label">Merged PRs</div>
             </div>
             """, unsafe_allow_html=True)
         with col4:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value">{len(closed_not_merged_prs)}</div>
+                <div class="metric-value">{summary['closed_not_merged']}</div>
                 <div class="metric-label">Closed (Not Merged)</div>
             </div>
             """, unsafe_allow_html=True)
@@ -671,28 +829,28 @@ with tab3:
         with col1:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value">{avg_duration:.1f}</div>
+                <div class="metric-value">{summary['avg_review_hours']:.1f}</div>
                 <div class="metric-label">Avg Review Time (hrs)</div>
             </div>
             """, unsafe_allow_html=True)
         with col2:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value">{avg_size:.0f}</div>
+                <div class="metric-value">{summary['avg_size']:.0f}</div>
                 <div class="metric-label">Avg PR Size (LoC)</div>
             </div>
             """, unsafe_allow_html=True)
         with col3:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value">{avg_comments:.1f}</div>
+                <div class="metric-value">{summary['avg_comments']:.1f}</div>
                 <div class="metric-label">Avg Comments per PR</div>
             </div>
             """, unsafe_allow_html=True)
         with col4:
             st.markdown(f"""
             <div class="metric-card">
-                <div class="metric-value">{len(pr_no_comments)}</div>
+                <div class="metric-value">{summary['merged_without_comments']}</div>
                 <div class="metric-label">Merged w/o Comments</div>
             </div>
             """, unsafe_allow_html=True)
@@ -702,26 +860,9 @@ with tab3:
         viz_tab1, viz_tab2, viz_tab3 = st.tabs(["PR Timeline", "PR Size Distribution", "Author Activity"])
         
         with viz_tab1:
-            # Create timeline data
-            if merged_prs:
-                timeline_data = []
-                for pr in merged_prs:
-                    created_at = pd.to_datetime(pr["created_at"])
-                    merged_at = pd.to_datetime(pr["merged_at"])
-                    repo = pr.get("base", {}).get("repo", {}).get("name", "Unknown")
-                    
-                    timeline_data.append({
-                        "PR": f"#{pr['number']} {pr['title'][:30]}...",
-                        "Repository": repo,
-                        "Start": created_at,
-                        "End": merged_at,
-                        "Duration (hrs)": (merged_at - created_at).total_seconds() / 3600
-                    })
-                
-                if timeline_data:
-                    timeline_df = pd.DataFrame(timeline_data)
-                    timeline_df = timeline_df.sort_values("Start")
-                    
+            timeline_df = views["timeline"]
+            if summary["merged"]:
+                if not timeline_df.empty:
                     # Create a Gantt chart
                     fig = px.timeline(
                         timeline_df, 
@@ -745,22 +886,9 @@ with tab3:
         
         with viz_tab2:
             # PR size distribution
-            if all_prs:
-                size_data = []
-                for pr in all_prs:
-                    size_data.append({
-                        "PR": f"#{pr['number']}",
-                        "Title": pr['title'],
-                        "Size": pr.get("additions", 0) + pr.get("deletions", 0),
-                        "Additions": pr.get("additions", 0),
-                        "Deletions": pr.get("deletions", 0),
-                        "Repository": pr.get("base", {}).get("repo", {}).get("name", "Unknown"),
-                        "State": pr.get("state", "unknown").capitalize()
-                    })
-                
-                if size_data:
-                    size_df = pd.DataFrame(size_data)
-                    
+            size_df = views["sizes"]
+            if summary["total"]:
+                if not size_df.empty:
                     # Create stacked bar chart for additions/deletions
                     fig = go.Figure()
                     fig.add_trace(go.Bar(
@@ -791,33 +919,10 @@ with tab3:
                 st.info("No PRs available for size distribution visualization")
         
         with viz_tab3:
-            # Author activity
-            if all_prs:
-                author_data = {}
-                for pr in all_prs:
-                    author = pr["user"]["login"]
-                    if author not in author_data:
-                        author_data[author] = {"count": 0, "additions": 0, "deletions": 0}
-                    
-                    author_data[author]["count"] += 1
-                    author_data[author]["additions"] += pr.get("additions", 0)
-                    author_data[author]["deletions"] += pr.get("deletions", 0)
-                
-                if author_data:
-                    author_df = pd.DataFrame([
-                        {
-                            "Author": author,
-                            "PR Count": data["count"],
-                            "Additions": data["additions"],
-                            "Deletions": data["deletions"],
-                            "Total Changes": data["additions"] + data["deletions"]
-                        }
-                        for author, data in author_data.items()
-                    ])
-                    
-                    # Sort by PR count
-                    author_df = author_df.sort_values("PR Count", ascending=False)
-                    
+            # Author activity, aggregated per author when the PRs were fetched
+            author_df = views["authors"]
+            if summary["total"]:
+                if not author_df.empty:
                     # Create bar chart
                     fig = px.bar(
                         author_df,
@@ -900,9 +1005,12 @@ with tab4:
         all_alerts = {}
         
         with st.spinner("Fetching CodeQL alerts..."):
+            rate_limit_status = st.empty()
             for repo in selected_repo_list:
                 try:
-                    alerts = fetch_codeql_alerts(repo, token)
+                    with wait_listener(lambda waiting: rate_limit_status.warning(rate_limit_message(waiting))):
+                        alerts = fetch_codeql_alerts(repo, token)
+                    rate_limit_status.empty()
                     all_alerts[repo] = alerts
                     if alerts:
                         st.warning(f"Found {len(alerts)} security alerts in {repo}")
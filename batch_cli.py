@@ -0,0 +1,247 @@
+"""
+Headless runs of the app's pipelines, e.g. from cron, writing JSON or Parquet files.
+
+    python batch_cli.py summaries --org NexusInnovate --since 2025-01-01 --until 2025-01-31
+    python batch_cli.py reviews --repos NexusInnovate/api --output-dir out
+    python batch_cli.py all --org NexusInnovate --format parquet --openai-concurrency 8
+
+PRs are read from the local PR warehouse (see pr_warehouse.py), which is synced first.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+import pandas as pd
+from ai_summarizer import summarize_diff, review_pr, summarize_org_release_notes, SummaryBatcher
+from github_utils import fetch_org_repos, fetch_codeql_alerts
+from github_rate_limit import get_governor
+from metrics_utils import analyze_pr_metrics, add_pr_analytics
+from pipeline import process_prs, summarize_repos, GITHUB_CONCURRENCY, OPENAI_CONCURRENCY
+from pr_frame import pr_views
+from pr_warehouse import get_warehouse, sync_repos
+from dotenv import load_dotenv
+load_dotenv()
+
+COMMANDS = ("summaries", "reviews", "metrics", "codeql")
+
+
+def _report(label):
+    # Progress lines every 25 PRs, and whenever a GitHub rate-limit wait is in progress
+    def report(done, total):
+        waiting = get_governor().waiting() if get_governor() else None
+        if waiting:
+            print(f"⏳ Waiting for GitHub rate limit ({waiting['reason']}), resuming in {waiting['seconds']}s")
+        elif done % 25 == 0:
+            print(f"{label} {done}/{total} PR(s)")
+    return report
+
+
+def run_summaries(args, repos, token):
+    use_cache = not args.no_cache
+    results, errors = process_prs(
+        repos, token, args.since, args.until, "closed",
+        lambda repo, pr, diff: summarize_diff(diff, use_cache=use_cache, repo=repo, pr_number=pr["number"],
+                                              caller="cli"),
+        on_progress=_report("Summarized"), github_concurrency=args.github_concurrency,
+        openai_concurrency=args.openai_concurrency, list_prs=get_warehouse().query_prs,
+        batcher=SummaryBatcher(use_cache=use_cache, caller="cli")
+    )
+    rows, repo_summaries = [], {}
+    for repo in repos:
+        for pr, summary in results[repo]:
+            if not pr.get("merged_at"):
+                continue
+            rows.append({
+                "repository": repo,
+                "number": pr["number"],
+                "title": pr["title"],
+                "author": pr["user"]["login"],
+                "merged_at": pr["merged_at"],
+                "url": pr["html_url"],
+                "summary": summary,
+            })
+            if summary is not None:
+                repo_summaries.setdefault(repo, []).append(summary)
+
+    repo_notes = summarize_repos(repo_summaries, use_cache=use_cache, openai_concurrency=args.openai_concurrency,
+                                 caller="cli")
+    notes = [{"scope": repo, "release_notes": note} for repo, note in repo_notes.items() if note]
+    # Failed, or skipped because the repo is over its daily OpenAI budget
+    errors.update({f"{repo} release notes": "unavailable" for repo, note in repo_notes.items() if note is None})
+    if len(notes) > 1:
+        try:
+            org_note = summarize_org_release_notes({row["scope"]: row["release_notes"] for row in notes},
+                                                   use_cache=use_cache, caller="cli")
+            notes.insert(0, {"scope": args.org or "all", "release_notes": org_note})
+        except Exception as e:
+            errors["org release notes"] = str(e)
+    return {"merged_prs": pd.DataFrame(rows), "release_notes": pd.DataFrame(notes)}, errors
+
+
+def run_reviews(args, repos, token):
+    use_cache = not args.no_cache
+    results, errors = process_prs(
+        repos, token, args.since, args.until, "open",
+        lambda repo, pr, diff: review_pr(diff, use_cache=use_cache, repo=repo, pr_number=pr["number"],
+                                         caller="cli"),
+        on_progress=_report("Reviewed"), github_concurrency=args.github_concurrency,
+        openai_concurrency=args.openai_concurrency, list_prs=get_warehouse().query_prs
+    )
+    rows = [{
+        "repository": repo,
+        "number": pr["number"],
+        "title": pr["title"],
+        "author": pr["user"]["login"],
+        "created_at": pr["created_at"],
+        "url": pr["html_url"],
+        "review": review,
+    } for repo in repos for pr, review in results[repo]]
+    return {"open_prs": pd.DataFrame(rows)}, errors
+
+
+def run_metrics(args, repos, token):
+    warehouse = get_warehouse()
+    all_prs, frames, errors = [], [], {}
+    for repo in repos:
+        try:
+            prs = warehouse.query_prs(repo, args.since, args.until, args.state)
+            enrichment = warehouse.load_enrichment(repo, prs)
+            prs = add_pr_analytics(repo, prs, enrichment)
+            if prs:
+                all_prs.extend(prs)
+                df = analyze_pr_metrics(repo, prs, enrichment=enrichment)
+                df["Repository"] = repo
+                frames.append(df)
+        except Exception as e:
+            errors[repo] = str(e)
+    if not all_prs:
+        return {}, errors
+    views = pr_views(all_prs)
+    return {
+        "pr_metrics": pd.concat(frames, ignore_index=True),
+        "pr_frame": views["frame"],
+        "pr_summary": pd.DataFrame([views["summary"]]),
+        "pr_authors": views["authors"],
+    }, errors
+
+
+def run_codeql(args, repos, token):
+    rows, errors = [], {}
+    for repo in repos:
+        try:
+            alerts = fetch_codeql_alerts(repo, token)
+        except Exception as e:
+            errors[repo] = str(e)
+            continue
+        for alert in alerts:
+            rule = alert.get("rule", {})
+            location = alert.get("most_recent_instance", {}).get("location", {})
+            rows.append({
+                "repository": repo,
+                "number": alert.get("number"),
+                "state": alert.get("state"),
+                "severity": rule.get("severity", "unknown"),
+                "security_severity": rule.get("security_severity_level"),
+                "rule": rule.get("id"),
+                "description": rule.get("description"),
+                "path": location.get("path"),
+                "start_line": location.get("start_line"),
+                "created_at": alert.get("created_at"),
+                "url": alert.get("html_url"),
+            })
+    return {"codeql_alerts": pd.DataFrame(rows)}, errors
+
+
+RUNNERS = {
+    "summaries": run_summaries,
+    "reviews": run_reviews,
+    "metrics": run_metrics,
+    "codeql": run_codeql,
+}
+
+
+def write_frame(frame, name, output_dir, fmt):
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    if fmt == "parquet":
+        # Parquet columns need one type; columns mixing numbers and text (e.g. "N/A") are stored as text
+        frame = frame.copy()
+        for column in frame.columns[frame.dtypes == object]:
+            if len({type(value) for value in frame[column].dropna()}) > 1:
+                frame[column] = frame[column].astype("string")
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_json(path, orient="records", date_format="iso", indent=2, force_ascii=False)
+    return path
+
+
+def main():
+    today = datetime.now()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=COMMANDS + ("all",), help="Pipeline to run")
+    parser.add_argument("--org", help="Run over every repository of this organization")
+    parser.add_argument("--repos", nargs="*", default=[], help="owner/name of repositories to include")
+    parser.add_argument("--since", default=(today - timedelta(days=30)).strftime("%Y-%m-%d"),
+                        help="Start date (YYYY-MM-DD), 30 days ago by default")
+    parser.add_argument("--until", default=today.strftime("%Y-%m-%d"), help="End date (YYYY-MM-DD), today by default")
+    parser.add_argument("--state", choices=("all", "open", "closed"), default="all", help="PRs included in metrics")
+    parser.add_argument("--output-dir", default="batch_output", help="Directory the result files are written to")
+    parser.add_argument("--format", choices=("json", "parquet"), default="json")
+    parser.add_argument("--github-concurrency", type=int, default=GITHUB_CONCURRENCY)
+    parser.add_argument("--openai-concurrency", type=int, default=OPENAI_CONCURRENCY)
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached summaries/reviews")
+    parser.add_argument("--force-sync", action="store_true", help="Sync the PR warehouse even if it is fresh")
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet needs the 'pyarrow' package")
+    token = os.getenv("GITHUB_TOKEN")
+    repos = list(args.repos)
+    if args.org:
+        repos += fetch_org_repos(args.org, token)
+    if not repos:
+        parser.error("needs --org or --repos")
+    commands = COMMANDS if args.command == "all" else (args.command,)
+
+    started = time.time()
+    errors = {}
+    if commands != ("codeql",):
+        synced, sync_errors = sync_repos(repos, token, args.since, force=args.force_sync,
+                                         concurrency=args.github_concurrency)
+        print(f"Synced {sum(synced.values())} updated PR(s) from {len(synced)} repo(s)")
+        errors.update({f"sync {repo}": error for repo, error in sync_errors.items()})
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    outputs = {}
+    for command in commands:
+        print(f"Running {command} for {len(repos)} repo(s) from {args.since} to {args.until}")
+        frames, command_errors = RUNNERS[command](args, repos, token)
+        errors.update({f"{command} {repo}": error for repo, error in command_errors.items()})
+        for name, frame in frames.items():
+            outputs[name] = {"path": write_frame(frame, name, args.output_dir, args.format), "rows": len(frame)}
+            print(f"{name}: {len(frame)} row(s) -> {outputs[name]['path']}")
+
+    # The manifest tells a scheduled job (or the dashboard) what the run covered
+    manifest = {
+        "command": args.command,
+        "repos": repos,
+        "since": args.since,
+        "until": args.until,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round(time.time() - started, 1),
+        "outputs": outputs,
+        "errors": errors,
+    }
+    with open(os.path.join(args.output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    for label, error in sorted(errors.items()):
+        print(f"⚠️ {label}: {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Compares the REST (three calls per PR, serial and on a thread pool) and GraphQL
+(batched) metrics loaders against the local stub GitHub server.
+
+    python benchmarks/bench_metrics_loader.py --prs 300 --latency 0.02
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_github import start_stub_github, pr_created_at
+
+
+def _prs(repo, count):
+    return [{
+        "number": number,
+        "html_url": f"https://github.com/{repo}/pull/{number}",
+        "created_at": pr_created_at(number),
+        "merged_at": None,
+        "user": {"login": "author"},
+    } for number in range(1, count + 1)]
+
+
+def _normalized(frame):
+    # Reviewer order comes from a set, so compare it sorted
+    frame = frame.copy()
+    frame["Reviewers"] = frame["Reviewers"].map(lambda value: ", ".join(sorted(value.split(", "))))
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prs", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated round trip per request (seconds)")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_stub_github(latency=args.latency)
+    os.environ["GITHUB_API"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GITHUB_TOKEN", "stub")
+    # Measure cold requests, not the local ETag cache
+    os.environ["HTTP_CACHE_ENABLED"] = "false"
+
+    import metrics_utils
+
+    repo = "bench/repo"
+    prs = _prs(repo, args.prs)
+    results = {"prs": args.prs, "latency": args.latency, "batch_size": args.batch_size,
+               "concurrency": args.concurrency}
+
+    metrics_utils.GRAPHQL_BATCH_SIZE = args.batch_size
+    frames = {}
+    for label, loader, concurrency in (("rest_serial", "rest", 1), ("rest_parallel", "rest", args.concurrency),
+                                       ("graphql", "graphql", args.concurrency)):
+        before = server.stats["requests"]
+        started = time.perf_counter()
+        enrichment = metrics_utils.enrich_prs(repo, prs, loader, concurrency)
+        metrics_utils.add_pr_analytics(repo, prs, enrichment)
+        frames[label] = metrics_utils.analyze_pr_metrics(repo, prs, enrichment=enrichment)
+        results[label] = {"seconds": round(time.perf_counter() - started, 3),
+                          "requests": server.stats["requests"] - before}
+
+    rest, graphql = frames["rest_serial"], frames["graphql"]
+    results["identical"] = all(_normalized(rest).equals(_normalized(frame)) for frame in frames.values())
+    results["speedup"] = round(results["rest_serial"]["seconds"] / max(results["graphql"]["seconds"], 1e-9), 1)
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
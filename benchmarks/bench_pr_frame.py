@@ -0,0 +1,154 @@
+"""
+Times the metrics tab computations on synthetic PRs: the former per-PR loops
+against the typed PR frame with vectorized aggregates (pr_frame.pr_views).
+
+    python benchmarks/bench_pr_frame.py --prs 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pr_frame import pr_views
+
+
+def synthetic_prs(count, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    authors = [f"user{i}" for i in range(200)]
+    repos = [f"repo{i}" for i in range(20)]
+    prs = []
+    for number in range(1, count + 1):
+        created = start + timedelta(minutes=rng.randrange(0, 500_000))
+        state = rng.choice(["open", "closed", "closed", "closed"])
+        merged = created + timedelta(minutes=rng.randrange(5, 20_000)) if state == "closed" and rng.random() < 0.8 else None
+        prs.append({
+            "number": number,
+            "title": f"Synthetic change number {number} touching several modules",
+            "state": state,
+            "user": {"login": rng.choice(authors)},
+            "base": {"repo": {"name": rng.choice(repos)}},
+            "created_at": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "merged_at": merged.strftime("%Y-%m-%dT%H:%M:%SZ") if merged else None,
+            "additions": rng.randrange(0, 2000),
+            "deletions": rng.randrange(0, 800),
+            "comments": rng.randrange(0, 10),
+            "review_comments": rng.randrange(0, 5),
+        })
+    return prs
+
+
+def loop_views(all_prs):
+    # The per-PR loops the metrics tab used before pr_frame
+    merged_prs = [pr for pr in all_prs if pr.get("merged_at")]
+    open_prs = [pr for pr in all_prs if pr.get("state") == "open"]
+    closed_not_merged_prs = [pr for pr in all_prs if pr.get("state") == "closed" and not pr.get("merged_at")]
+    review_durations = [
+        (pd.to_datetime(pr["merged_at"]) - pd.to_datetime(pr["created_at"])).total_seconds() / 3600
+        for pr in all_prs if pr.get("merged_at") and pr.get("created_at")
+    ]
+    avg_duration = sum(review_durations) / len(review_durations) if review_durations else 0
+    avg_size = sum(pr.get("additions", 0) + pr.get("deletions", 0) for pr in all_prs) / len(all_prs)
+    comments_per_pr = [pr.get("comments", 0) + pr.get("review_comments", 0) for pr in all_prs]
+    avg_comments = sum(comments_per_pr) / len(comments_per_pr)
+    pr_no_comments = [pr for pr in all_prs if pr.get("merged_at") and pr.get("review_comments", 0) == 0]
+
+    timeline_data = []
+    for pr in merged_prs:
+        created_at = pd.to_datetime(pr["created_at"])
+        merged_at = pd.to_datetime(pr["merged_at"])
+        timeline_data.append({
+            "PR": f"#{pr['number']} {pr['title'][:30]}...",
+            "Repository": pr.get("base", {}).get("repo", {}).get("name", "Unknown"),
+            "Start": created_at,
+            "End": merged_at,
+            "Duration (hrs)": (merged_at - created_at).total_seconds() / 3600,
+        })
+    timeline_df = pd.DataFrame(timeline_data).sort_values("Start")
+
+    size_df = pd.DataFrame([{
+        "PR": f"#{pr['number']}",
+        "Title": pr["title"],
+        "Size": pr.get("additions", 0) + pr.get("deletions", 0),
+        "Additions": pr.get("additions", 0),
+        "Deletions": pr.get("deletions", 0),
+        "Repository": pr.get("base", {}).get("repo", {}).get("name", "Unknown"),
+        "State": pr.get("state", "unknown").capitalize(),
+    } for pr in all_prs])
+
+    author_data = {}
+    for pr in all_prs:
+        author = pr["user"]["login"]
+        if author not in author_data:
+            author_data[author] = {"count": 0, "additions": 0, "deletions": 0}
+        author_data[author]["count"] += 1
+        author_data[author]["additions"] += pr.get("additions", 0)
+        author_data[author]["deletions"] += pr.get("deletions", 0)
+    author_df = pd.DataFrame([{
+        "Author": author,
+        "PR Count": data["count"],
+        "Additions": data["additions"],
+        "Deletions": data["deletions"],
+        "Total Changes": data["additions"] + data["deletions"],
+    } for author, data in author_data.items()]).sort_values("PR Count", ascending=False)
+
+    summary = {
+        "total": len(all_prs),
+        "open": len(open_prs),
+        "merged": len(merged_prs),
+        "closed_not_merged": len(closed_not_merged_prs),
+        "avg_review_hours": avg_duration,
+        "avg_size": avg_size,
+        "avg_comments": avg_comments,
+        "merged_without_comments": len(pr_no_comments),
+    }
+    return {"summary": summary, "timeline": timeline_df, "sizes": size_df, "authors": author_df}
+
+
+def _timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, round(best, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prs", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=1, help="Best of N runs")
+    args = parser.parse_args()
+
+    prs = synthetic_prs(args.prs)
+    loop, loop_seconds = _timed(loop_views, prs, repeat=args.repeat)
+    vectorized, vectorized_seconds = _timed(pr_views, prs, repeat=args.repeat)
+
+    summaries_match = all(
+        abs(loop["summary"][key] - vectorized["summary"][key]) < 1e-6 for key in loop["summary"]
+    )
+    authors_match = (
+        loop["authors"].set_index("Author").sort_index()[["PR Count", "Additions", "Deletions"]].to_numpy()
+        == vectorized["authors"].set_index("Author").sort_index()[["PR Count", "Additions", "Deletions"]].to_numpy()
+    ).all()
+    print(json.dumps({
+        "prs": args.prs,
+        "loop_seconds": loop_seconds,
+        "vectorized_seconds": vectorized_seconds,
+        "speedup": round(loop_seconds / max(vectorized_seconds, 1e-9), 1),
+        "summaries_match": bool(summaries_match),
+        "authors_match": bool(authors_match),
+        "timeline_rows_match": len(loop["timeline"]) == len(vectorized["timeline"]),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
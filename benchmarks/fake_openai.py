@@ -0,0 +1,157 @@
+"""
+Local stand-in for the OpenAI Responses API, including `stream=True` (server-sent events)
+and the JSON-schema output of batched summaries.
+
+    python benchmarks/fake_openai.py --port 8001 --latency 0.5 --rate-limit-every 5
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=fake python3 run_app.py
+"""
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _response_body(model, text, input_tokens, output_tokens):
+    return {
+        "id": f"resp_fake_{time.time_ns()}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": f"msg_fake_{time.time_ns()}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def make_handler(latency=0.0, rate_limit_every=0, retry_after=1.0):
+    counter = itertools.count(1)
+    stats = {"requests": 0, "rate_limited": 0}
+    lock = threading.Lock()
+
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Small writes (headers, stream events) must not wait for delayed ACKs
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client cancelled the request
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/responses"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            number = next(counter)
+            with lock:
+                stats["requests"] += 1
+            if rate_limit_every and number % rate_limit_every == 0:
+                with lock:
+                    stats["rate_limited"] += 1
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                    {"retry-after": str(retry_after)},
+                )
+                return
+            prompt = str(request.get("input", ""))
+            text = f"Fake summary of {len(prompt)} characters."
+            if ((request.get("text") or {}).get("format") or {}).get("type") == "json_schema":
+                # Batched summaries: one entry per "### PR <id>" heading of the prompt
+                text = json.dumps({"summaries": [
+                    {"id": pr_id, "summary": f"Fake summary of PR {pr_id}."}
+                    for pr_id in re.findall(r"^### PR (\S+)$", prompt, re.MULTILINE)
+                ]})
+            body = _response_body(request.get("model", "gpt-4o"), text, len(prompt) // 4 + 1, 12)
+            if request.get("stream"):
+                self._send_stream(body, text)
+                return
+            time.sleep(latency)
+            self._send_json(200, body)
+
+        def _send_stream(self, body, text):
+            # Server-sent events as the Responses API emits them; `latency` is spread over the words
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            words = [word + " " for word in text.split(" ")]
+            words[-1] = words[-1].rstrip()
+            events = [{"type": "response.created", "response": {**body, "status": "in_progress", "output": []}}]
+            events += [{
+                "type": "response.output_text.delta", "item_id": body["output"][0]["id"],
+                "output_index": 0, "content_index": 0, "delta": word, "logprobs": [],
+            } for word in words]
+            events.append({"type": "response.completed", "response": body})
+            try:
+                for number, event in enumerate(events):
+                    if event["type"] == "response.output_text.delta":
+                        time.sleep(latency / len(words))
+                    payload = json.dumps({**event, "sequence_number": number})
+                    self.wfile.write(f"event: {event['type']}\ndata: {payload}\n\n".encode())
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    FakeOpenAIHandler.stats = stats
+    return FakeOpenAIHandler
+
+
+def start_fake_openai(port=0, latency=0.0, rate_limit_every=0, retry_after=1.0):
+    """
+    Starts the fake server on a background thread; returns the server (see server.server_port).
+    """
+    handler = make_handler(latency, rate_limit_every, retry_after)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.stats = handler.stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI Responses API server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per completed response")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after sent with 429s")
+    args = parser.parse_args()
+    server = start_fake_openai(args.port, args.latency, args.rate_limit_every, args.retry_after)
+    print(f"Fake OpenAI listening on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,248 @@
+"""
+Times the main pipelines end to end against the local stub GitHub and fake OpenAI
+servers, without touching real APIs, and reports the results as JSON.
+
+    python benchmarks/run_benchmarks.py --prs 2000 --repos 5 --output bench.json
+    python benchmarks/run_benchmarks.py --only fetch_prs metrics --github-latency 0.05
+    python benchmarks/run_benchmarks.py --only merged_summaries --rate-limit-every 20
+
+Caches (HTTP, diff store, LLM) are disabled so every run measures cold requests.
+"""
+import argparse
+import contextlib
+import hashlib
+import hmac
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_github import start_stub_github, pr_created_at, pr_summary
+from fake_openai import start_fake_openai
+
+ORG = "bench"
+TOKEN = "stub"
+WEBHOOK_SECRET = "bench-secret"
+
+
+def _measure(context, run):
+    """
+    Runs run() and returns its result dict with the wall time and the requests it made.
+    """
+    github, openai = context["github"].stats, context["openai"].stats
+    before = (github["requests"], openai["requests"], openai["rate_limited"])
+    started = time.perf_counter()
+    result = run()
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    result["github_requests"] = github["requests"] - before[0]
+    result["openai_requests"] = openai["requests"] - before[1]
+    result["openai_rate_limited"] = openai["rate_limited"] - before[2]
+    return result
+
+
+def bench_fetch_prs(context):
+    from github_utils import fetch_prs
+    repo = context["repos"][0]
+    return _measure(context, lambda: {"prs": len(fetch_prs(repo, TOKEN, context["since"], context["until"], "all"))})
+
+
+def bench_metrics(context):
+    from github_utils import fetch_prs
+    from metrics_utils import enrich_prs, add_pr_analytics, analyze_pr_metrics
+    repo = context["repos"][0]
+    prs = fetch_prs(repo, TOKEN, context["since"], context["until"], "all")
+
+    def run():
+        enrichment = enrich_prs(repo, prs)
+        analyzed = add_pr_analytics(repo, prs, enrichment)
+        frame = analyze_pr_metrics(repo, analyzed, enrichment=enrichment)
+        return {"prs": len(prs), "rows": len(frame)}
+    return _measure(context, run)
+
+
+def bench_merged_summaries(context):
+    from ai_summarizer import summarize_diff, SummaryBatcher
+    from pipeline import process_prs, summarize_repos
+    args = context["args"]
+    repos = context["repos"][:args.summary_repos]
+    # The newest --summary-prs PRs of each repo, like a release window
+    since = pr_created_at(max(0, args.prs - args.summary_prs))
+
+    def run():
+        results, errors = process_prs(
+            repos, TOKEN, since, context["until"], "closed",
+            lambda repo, pr, diff: summarize_diff(diff, use_cache=False, repo=repo, pr_number=pr["number"],
+                                                  caller="benchmark"),
+            batcher=SummaryBatcher(use_cache=False, caller="benchmark") if not args.no_batch else None
+        )
+        summaries = {repo: [summary for _, summary in results[repo] if summary] for repo in repos}
+        notes = summarize_repos(summaries, use_cache=False, caller="benchmark")
+        return {
+            "repos": len(repos),
+            "prs": sum(len(items) for items in results.values()),
+            "failed": sum(summary is None for items in results.values() for _, summary in items),
+            "release_notes": sum(1 for note in notes.values() if note),
+            "errors": errors,
+        }
+    return _measure(context, run)
+
+
+def bench_codeql(context):
+    from github_utils import fetch_codeql_alerts
+    return _measure(context, lambda: {
+        "alerts": sum(len(fetch_codeql_alerts(repo, TOKEN)) for repo in context["repos"])
+    })
+
+
+def _delivery(repo, number):
+    pr = pr_summary(repo, number)
+    return {
+        "action": "opened",
+        "repository": {"full_name": repo},
+        "pull_request": {
+            **pr,
+            "comments_url": f"{os.environ['GITHUB_API']}/repos/{repo}/issues/{number}/comments",
+            "additions": 40,
+            "deletions": 5,
+        },
+    }
+
+
+def bench_webhook(context):
+    from fastapi.testclient import TestClient
+    import webhook_server
+    args = context["args"]
+    repo = context["repos"][0]
+    deliveries = [json.dumps(_delivery(repo, number)).encode() for number in range(1, args.webhook_prs + 1)]
+
+    def run():
+        latencies = []
+        posted = context["github"].stats["comments_posted"]
+        with TestClient(webhook_server.app) as client:
+            started = time.perf_counter()
+            for body in deliveries:
+                signature = "sha256=" + hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+                sent = time.perf_counter()
+                response = client.post("/pr-reviewer-webhook", content=body,
+                                       headers={"X-Hub-Signature-256": signature, "Content-Type": "application/json"})
+                latencies.append(time.perf_counter() - sent)
+                response.raise_for_status()
+            # Wait for the workers to post every review
+            deadline = time.time() + args.webhook_timeout
+            while time.time() < deadline:
+                depth = webhook_server.job_queue.depth()
+                if depth["pending"] == 0 and depth["running"] == 0:
+                    break
+                time.sleep(0.05)
+            drained = time.perf_counter() - started
+        latencies.sort()
+        return {
+            "deliveries": len(deliveries),
+            "accept_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+            "accept_p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            "drain_seconds": round(drained, 3),
+            "queue": webhook_server.job_queue.depth(),
+            "comments_posted": context["github"].stats["comments_posted"] - posted,
+        }
+    return _measure(context, run)
+
+
+BENCHMARKS = {
+    "fetch_prs": bench_fetch_prs,
+    "metrics": bench_metrics,
+    "codeql": bench_codeql,
+    "merged_summaries": bench_merged_summaries,
+    "webhook": bench_webhook,
+}
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--prs", type=int, default=2000, help="PRs per repository")
+    parser.add_argument("--repos", type=int, default=5, help="Repositories in the synthetic org")
+    parser.add_argument("--alerts", type=int, default=50, help="CodeQL alerts per repository")
+    parser.add_argument("--github-latency", type=float, default=0.02, help="Simulated GitHub round trip (seconds)")
+    parser.add_argument("--openai-latency", type=float, default=0.5, help="Simulated model response time (seconds)")
+    parser.add_argument("--rate-limit-every", type=int, default=0,
+                        help="Fake OpenAI answers every Nth request with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after sent with the 429s")
+    parser.add_argument("--summary-repos", type=int, default=2, help="Repositories in the merged PR summary run")
+    parser.add_argument("--summary-prs", type=int, default=200, help="Newest PRs per repository in the summary run")
+    parser.add_argument("--no-batch", action="store_true", help="Summarize every PR with its own request")
+    parser.add_argument("--webhook-prs", type=int, default=50, help="PR deliveries sent to the webhook")
+    parser.add_argument("--webhook-timeout", type=float, default=300, help="Seconds to wait for the webhook queue")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    github = start_stub_github(latency=args.github_latency, pr_count=args.prs, repo_count=args.repos,
+                               alert_count=args.alerts)
+    openai = start_fake_openai(latency=args.openai_latency, rate_limit_every=args.rate_limit_every,
+                               retry_after=args.retry_after)
+    workdir = tempfile.mkdtemp(prefix="pr-bench-")
+    # Configuration is read at import time, so it is set before any project module is imported
+    os.environ.update({
+        "GITHUB_API": f"http://127.0.0.1:{github.server_port}",
+        "GITHUB_TOKEN": TOKEN,
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai.server_port}/v1",
+        "OPENAI_API_KEY": "fake",
+        "CACHE_DIR": workdir,
+        "HTTP_CACHE_ENABLED": "false",
+        "LLM_CACHE_ENABLED": "false",
+        "DIFF_STORE_ENABLED": "false",
+        "GITHUB_WEBHOOK_SECRET": WEBHOOK_SECRET,
+        "WEBHOOK_QUIET_SECONDS": "0",
+        "WEBHOOK_POLL_SECONDS": "0.05",
+    })
+    # The fake server has no account budget; only its 429s should slow callers down
+    os.environ.setdefault("OPENAI_RPM", "1000000")
+    os.environ.setdefault("OPENAI_TPM", "1000000000")
+
+    context = {
+        "args": args,
+        "github": github,
+        "openai": openai,
+        "repos": [f"{ORG}/repo{index}" for index in range(args.repos)],
+        "since": "2000-01-01",
+        "until": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "config": {name: value for name, value in vars(args).items() if name != "output"},
+        "results": {},
+    }
+    # The pipelines log to stdout; keep it for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        for name in args.only or BENCHMARKS:
+            print(f"running {name}...")
+            report["results"][name] = BENCHMARKS[name](context)
+
+    github.shutdown()
+    openai.shutdown()
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Local stand-in for the GitHub REST and GraphQL endpoints used by the app and the
+webhook: org and PR listings, PR metrics, diffs, compares, PR comments and CodeQL alerts.
+
+Data is synthetic and deterministic per PR number, so the REST and GraphQL
+loaders can be compared on identical answers.
+
+    python benchmarks/stub_github.py --port 8002 --latency 0.02
+    GITHUB_API=http://127.0.0.1:8002 python3 run_app.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode
+
+CREATED_AT = datetime(2025, 1, 1, tzinfo=timezone.utc)
+USERS = [f"user{i}" for i in range(7)]
+
+
+def _iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def pr_created_at(number):
+    return _iso(CREATED_AT + timedelta(hours=number))
+
+
+def pr_summary(repo, number):
+    """
+    A PR as returned by the list endpoint. Every 4th PR is open, most closed ones are merged.
+    """
+    created = CREATED_AT + timedelta(hours=number)
+    state = "open" if number % 4 == 0 else "closed"
+    merged = state == "closed" and number % 5 != 0
+    return {
+        "number": number,
+        "title": f"Change {number}",
+        "state": state,
+        "user": {"login": USERS[number % len(USERS)]},
+        "html_url": f"https://github.com/{repo}/pull/{number}",
+        "created_at": _iso(created),
+        "updated_at": _iso(created + timedelta(hours=1)),
+        "merged_at": _iso(created + timedelta(hours=1)) if merged else None,
+        "base": {"sha": f"{number:040x}"},
+        "head": {"sha": f"{number + 1:040x}"},
+    }
+
+
+def pr_stats(number):
+    """
+    Synthetic additions, deletions, comment authors, review comments and first review time of a PR.
+    Every 100th PR has 150 comments so GraphQL cursor pagination is exercised.
+    """
+    comment_count = 150 if number % 100 == 0 else number % 5
+    first_review = None
+    if number % 3:
+        first_review = _iso(CREATED_AT + timedelta(hours=number + number % 48, minutes=number % 60))
+    return {
+        "additions": number * 3 % 500,
+        "deletions": number % 97,
+        "commenters": [USERS[(number + i) % len(USERS)] for i in range(comment_count)],
+        "first_review_at": first_review,
+        "review_comments": number % 4 if first_review else 0,
+    }
+
+
+def pr_diff(number, lines=None):
+    """
+    A unified diff of the PR touching a few files; most PRs are small, as in real orgs.
+    """
+    if lines is None:
+        lines = 20 + number % 30 if number % 10 else 200 + number % 400
+    files = 1 + number % 4
+    sections = []
+    for index in range(files):
+        path = f"src/module{(number + index) % 40}/file{index}.py"
+        body = "".join(f"+value_{number}_{line} = compute({line})\n" for line in range(lines // files))
+        sections.append(
+            f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+            f"@@ -1,0 +1,{lines // files} @@\n{body}"
+        )
+    return "".join(sections)
+
+
+def codeql_alerts(repo, count):
+    severities = ["error", "warning", "note"]
+    return [{
+        "number": number,
+        "state": "open",
+        "created_at": pr_created_at(number),
+        "html_url": f"https://github.com/{repo}/security/code-scanning/{number}",
+        "rule": {
+            "id": f"py/rule-{number % 12}",
+            "severity": severities[number % len(severities)],
+            "security_severity_level": ["critical", "high", "medium", "low"][number % 4],
+            "description": f"Synthetic finding {number}",
+        },
+        "tool": {"name": "CodeQL"},
+        "most_recent_instance": {
+            "ref": "refs/heads/main",
+            "location": {"path": f"src/module{number % 40}/file.py", "start_line": number % 200 + 1},
+        },
+    } for number in range(1, count + 1)]
+
+
+def make_handler(latency=0.0, pr_count=300, repo_count=5, alert_count=20):
+    stats = {"requests": 0, "rest": 0, "graphql": 0, "comments_posted": 0}
+    lock = threading.Lock()
+
+    class StubGitHubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this, delayed ACKs add ~40ms per request
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _send_text(self, status, text):
+            body = text.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _count(self, kind):
+            with lock:
+                stats["requests"] += 1
+                stats[kind] += 1
+
+        def do_GET(self):
+            self._count("rest")
+            time.sleep(latency)
+            path, _, query = self.path.partition("?")
+            org_listing = re.match(r"^/orgs/([^/]+)/repos$", path)
+            if org_listing:
+                org = org_listing.group(1)
+                repos = [{"full_name": f"{org}/repo{i}", "owner": {"login": org}} for i in range(repo_count)]
+                self._send_page(repos, path, parse_qs(query), {})
+                return
+            listing = re.match(r"^/repos/([^/]+/[^/]+)/pulls$", path)
+            if listing:
+                self._list_prs(listing.group(1), path, parse_qs(query))
+                return
+            alerts = re.match(r"^/repos/([^/]+/[^/]+)/code-scanning/alerts$", path)
+            if alerts:
+                self._send_json(200, codeql_alerts(alerts.group(1), alert_count))
+                return
+            compare = re.match(r"^/repos/[^/]+/[^/]+/compare/([0-9a-f]+)\.\.\.([0-9a-f]+)$", path)
+            if compare:
+                self._compare(int(compare.group(1), 16), int(compare.group(2), 16))
+                return
+            match = re.match(r"^/repos/[^/]+/[^/]+/(pulls|issues)/(\d+)(?:/(comments|timeline))?$", path)
+            if not match:
+                self._send_json(404, {"message": "Not Found"})
+                return
+            kind, number, sub = match.group(1), int(match.group(2)), match.group(3)
+            pr = pr_stats(number)
+            if kind == "pulls" and sub is None and "diff" in self.headers.get("Accept", ""):
+                self._send_text(200, pr_diff(number))
+            elif kind == "pulls" and sub is None:
+                self._send_json(200, {
+                    "number": number,
+                    "additions": pr["additions"],
+                    "deletions": pr["deletions"],
+                    "comments": len(pr["commenters"]),
+                    "review_comments": pr["review_comments"],
+                })
+            elif kind == "issues" and sub == "comments":
+                self._send_json(200, [{"user": {"login": login}, "body": "LGTM"} for login in pr["commenters"]])
+            elif kind == "issues" and sub == "timeline":
+                events = [{"event": "commented"}] if pr["commenters"] else []
+                if pr["first_review_at"]:
+                    events.append({"event": "reviewed", "submitted_at": pr["first_review_at"]})
+                self._send_json(200, events)
+            else:
+                self._send_json(404, {"message": "Not Found"})
+
+        def _compare(self, base, head):
+            # Head shas are PR number + 1 (see pr_summary); later pushes add to it
+            lines = 5 * max(1, head - base)
+            if "diff" in self.headers.get("Accept", ""):
+                self._send_text(200, pr_diff(head, lines))
+                return
+            self._send_json(200, {
+                "status": "ahead" if head > base else "diverged",
+                "files": [{"filename": "src/file.py", "additions": lines, "deletions": 0}],
+            })
+
+        def _list_prs(self, repo, path, params):
+            # Newest update first, like sort=updated&direction=desc
+            state = params.get("state", ["open"])[0]
+            prs = [pr_summary(repo, number) for number in range(pr_count, 0, -1)]
+            if state != "all":
+                prs = [pr for pr in prs if pr["state"] == state]
+            self._send_page(prs, path, params, {"state": state})
+
+        def _send_page(self, items, path, params, query):
+            per_page = int(params.get("per_page", ["30"])[0])
+            page = int(params.get("page", ["1"])[0])
+            start = (page - 1) * per_page
+            headers = {}
+            if start + per_page < len(items):
+                next_query = urlencode({**query, "per_page": per_page, "page": page + 1})
+                headers["Link"] = f'<http://{self.headers["Host"]}{path}?{next_query}>; rel="next"'
+            self._send_json(200, items[start:start + per_page], headers)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if re.match(r"^/repos/[^/]+/[^/]+/issues/\d+/comments$", self.path):
+                self._count("rest")
+                time.sleep(latency)
+                with lock:
+                    stats["comments_posted"] += 1
+                self._send_json(201, {"id": stats["comments_posted"], "body": request.get("body", "")})
+                return
+            if self.path.rstrip("/") not in ("/graphql", "/api/graphql"):
+                self._send_json(404, {"message": "Not Found"})
+                return
+            self._count("graphql")
+            time.sleep(latency)
+            self._send_json(200, {"data": {"repository": self._resolve(request)}})
+
+        def _resolve(self, request):
+            # Only understands the query shapes built by metrics_utils
+            query = request.get("query", "")
+            variables = request.get("variables") or {}
+            if "after: $cursor" in query:
+                pr = pr_stats(variables["number"])
+                return {"pullRequest": {"comments": _comment_page(pr["commenters"], variables["cursor"])}}
+            repository = {}
+            for alias, number in re.findall(r"(\w+): pullRequest\(number: (\d+)\)", query):
+                pr = pr_stats(int(number))
+                repository[alias] = {
+                    "number": int(number),
+                    "additions": pr["additions"],
+                    "deletions": pr["deletions"],
+                    "comments": _comment_page(pr["commenters"], None),
+                    "reviews": {"nodes": [{
+                        "submittedAt": pr["first_review_at"],
+                        "comments": {"totalCount": pr["review_comments"]},
+                    }] if pr["first_review_at"] else []},
+                }
+            return repository
+
+        def log_message(self, *args):
+            pass
+
+    StubGitHubHandler.stats = stats
+    return StubGitHubHandler
+
+
+def _comment_page(commenters, cursor, page_size=100):
+    start = int(cursor) if cursor else 0
+    end = start + page_size
+    return {
+        "pageInfo": {"hasNextPage": end < len(commenters), "endCursor": str(end)},
+        "nodes": [{"author": {"login": login}} for login in commenters[start:end]],
+    }
+
+
+def start_stub_github(port=0, latency=0.0, pr_count=300, repo_count=5, alert_count=20):
+    """
+    Starts the stub on a background thread; returns the server (see server.server_port).
+    """
+    handler = make_handler(latency, pr_count, repo_count, alert_count)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.stats = handler.stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub GitHub REST/GraphQL server")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per request (simulated round trip)")
+    parser.add_argument("--prs", type=int, default=300, help="PRs per repository")
+    parser.add_argument("--repos", type=int, default=5, help="Repositories per organization")
+    parser.add_argument("--alerts", type=int, default=20, help="CodeQL alerts per repository")
+    args = parser.parse_args()
+    server = start_stub_github(args.port, args.latency, args.prs, args.repos, args.alerts)
+    print(f"Stub GitHub listening on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,120 @@
+import os
+from token_utils import estimate_tokens
+from dotenv import load_dotenv
+load_dotenv()
+
+# Max prompt tokens of diff text sent per model call; override with
+# DIFF_CHUNK_TOKENS="gpt-4o=12000,gpt-4o-mini=8000"
+DEFAULT_CHUNK_TOKENS = 12000
+MODEL_CHUNK_TOKENS = {
+    "gpt-4o": 12000,
+    "gpt-4o-mini": 12000,
+}
+for _item in filter(None, os.getenv("DIFF_CHUNK_TOKENS", "").split(",")):
+    _model, _, _budget = _item.partition("=")
+    MODEL_CHUNK_TOKENS[_model.strip()] = int(_budget)
+
+
+def chunk_budget(model):
+    return MODEL_CHUNK_TOKENS.get(model, DEFAULT_CHUNK_TOKENS)
+
+
+def split_diff_files(diff_text):
+    """
+    Splits a unified diff into one section per file (each starting at `diff --git`).
+    Text that is not a git diff comes back as a single section.
+    """
+    sections = []
+    current = []
+    for line in diff_text.splitlines(keepends=True):
+        if line.startswith("diff --git ") and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+def split_hunks(file_section):
+    """
+    Returns (header, hunks) for one file section; header is everything before the first `@@`.
+    """
+    header = []
+    hunks = []
+    for line in file_section.splitlines(keepends=True):
+        if line.startswith("@@"):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+    return "".join(header), ["".join(hunk) for hunk in hunks]
+
+
+def _split_lines(text, budget):
+    pieces = []
+    current = []
+    used = 0
+    for line in text.splitlines(keepends=True):
+        cost = estimate_tokens(line)
+        if current and used + cost > budget:
+            pieces.append("".join(current))
+            current = []
+            used = 0
+        current.append(line)
+        used += cost
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+
+def _split_file(file_section, budget):
+    # Oversized files are cut on hunk boundaries, repeating the file header on every piece
+    header, hunks = split_hunks(file_section)
+    header_cost = estimate_tokens(header)
+    if not hunks or header_cost >= budget:
+        return _split_lines(file_section, budget)
+    pieces = []
+    for hunk in hunks:
+        if header_cost + estimate_tokens(hunk) > budget:
+            pieces.extend(header + part for part in _split_lines(hunk, budget - header_cost))
+        else:
+            pieces.append(header + hunk)
+    return _pack(pieces, budget, header=header)
+
+
+def _pack(pieces, budget, header=""):
+    chunks = []
+    current = ""
+    used = 0
+    for piece in pieces:
+        cost = estimate_tokens(piece)
+        if current and used + cost > budget:
+            chunks.append(current)
+            current = ""
+            used = 0
+        if header and current:
+            # Consecutive hunks of the same file share one header
+            piece = piece[len(header):]
+        current += piece
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_diff(diff_text, budget):
+    """
+    Splits a diff into chunks of at most ~`budget` tokens, cutting on file
+    boundaries first, then hunk boundaries, then lines.
+    """
+    if estimate_tokens(diff_text) <= budget:
+        return [diff_text]
+    pieces = []
+    for section in split_diff_files(diff_text):
+        if estimate_tokens(section) > budget:
+            pieces.extend(_split_file(section, budget))
+        else:
+            pieces.append(section)
+    return _pack(pieces, budget)
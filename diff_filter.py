@@ -0,0 +1,122 @@
+import os
+import re
+import fnmatch
+import threading
+from diff_chunker import split_diff_files
+from token_utils import estimate_tokens
+from dotenv import load_dotenv
+load_dotenv()
+
+DIFF_FILTER_ENABLED = os.getenv("DIFF_FILTER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Added lines longer than this on average are treated as minified/generated output
+DIFF_FILTER_MAX_AVG_LINE = int(os.getenv("DIFF_FILTER_MAX_AVG_LINE", "300"))
+# Only files with at least this many added lines are checked for generated markers/line length
+DIFF_FILTER_MIN_LINES = int(os.getenv("DIFF_FILTER_MIN_LINES", "20"))
+
+IGNORE_GLOBS = {
+    "lockfile": [
+        "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock",
+        "Pipfile.lock", "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum", "*.lock",
+    ],
+    "minified": ["*.min.js", "*.min.css", "*.map", "*.bundle.js"],
+    "snapshot": ["*.snap", "__snapshots__/*"],
+    "vendored": ["vendor/*", "node_modules/*", "third_party/*", "dist/*"],
+}
+# Extra globs, e.g. DIFF_IGNORE_GLOBS="*.pb.go,docs/api/*"
+_custom = [glob.strip() for glob in os.getenv("DIFF_IGNORE_GLOBS", "").split(",") if glob.strip()]
+if _custom:
+    IGNORE_GLOBS["custom"] = _custom
+
+GENERATED_MARKERS = re.compile(r"@generated|DO NOT EDIT|Code generated by|auto-?generated", re.IGNORECASE)
+
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+def parse_file_diff(section):
+    """
+    Extracts the path, binary flag and added lines from one `diff --git` section.
+    """
+    path = None
+    binary = False
+    added = []
+    for line in section.splitlines():
+        if line.startswith("diff --git "):
+            match = re.match(r"diff --git a/(.+?) b/(.+)$", line)
+            if match:
+                path = match.group(2)
+        elif line.startswith("+++ ") and line[4:] != "/dev/null":
+            path = line[6:] if line.startswith("+++ b/") else line[4:]
+        elif line.startswith("Binary files ") or line.startswith("GIT binary patch"):
+            binary = True
+        elif line.startswith("+") and not line.startswith("+++"):
+            added.append(line[1:])
+    return {"path": path, "binary": binary, "added": added}
+
+
+def _matches(path, pattern):
+    return (
+        fnmatch.fnmatch(path, pattern)
+        or fnmatch.fnmatch(os.path.basename(path), pattern)
+        or fnmatch.fnmatch(path, "*/" + pattern)
+    )
+
+
+def match_rule(parsed, ignore_globs=None):
+    """
+    Returns the name of the first rule that drops this file, or None to keep it.
+    """
+    if parsed["binary"]:
+        return "binary"
+    path = parsed["path"] or ""
+    for rule, patterns in (ignore_globs or IGNORE_GLOBS).items():
+        if any(_matches(path, pattern) for pattern in patterns):
+            return rule
+    added = parsed["added"]
+    if len(added) >= DIFF_FILTER_MIN_LINES:
+        if any(GENERATED_MARKERS.search(line) for line in added[:10]):
+            return "generated"
+        if sum(len(line) for line in added) / len(added) > DIFF_FILTER_MAX_AVG_LINE:
+            return "long_lines"
+    return None
+
+
+def filter_diff(diff_text, ignore_globs=None):
+    """
+    Drops lockfile, minified, snapshot, vendored, binary and generated files from a diff.
+
+    Each dropped file is replaced by a one-line note so the model still knows it changed.
+    Returns (filtered_diff, report) where report maps rule -> {"files", "bytes", "tokens"} saved.
+    """
+    kept = []
+    report = {}
+    for section in split_diff_files(diff_text):
+        if not section.startswith("diff --git "):
+            kept.append(section)
+            continue
+        parsed = parse_file_diff(section)
+        rule = match_rule(parsed, ignore_globs)
+        if rule is None:
+            kept.append(section)
+            continue
+        note = f"diff --git a/{parsed['path']} b/{parsed['path']}\n# changes omitted ({rule})\n"
+        kept.append(note)
+        saved = report.setdefault(rule, {"files": 0, "bytes": 0, "tokens": 0})
+        saved["files"] += 1
+        saved["bytes"] += len(section.encode("utf-8")) - len(note)
+        saved["tokens"] += estimate_tokens(section) - estimate_tokens(note)
+
+    with _totals_lock:
+        for rule, saved in report.items():
+            total = _totals.setdefault(rule, {"files": 0, "bytes": 0, "tokens": 0})
+            for field, value in saved.items():
+                total[field] += value
+    return "".join(kept), report
+
+
+def filter_totals():
+    """
+    Bytes/tokens saved per rule since the process started.
+    """
+    with _totals_lock:
+        return {rule: dict(saved) for rule, saved in _totals.items()}
@@ -0,0 +1,184 @@
+import os
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+load_dotenv()
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+DIFF_STORE_DIR = os.getenv("DIFF_STORE_DIR", os.path.join(CACHE_DIR, "diffs"))
+DIFF_STORE_MAX_BYTES = int(os.getenv("DIFF_STORE_MAX_BYTES", str(1024 * 1024 * 1024)))
+DIFF_MEMORY_MAX_BYTES = int(os.getenv("DIFF_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+# Eviction frees disk down to this fraction of the budget, so the directory is not
+# rescanned on every put once it is full
+DISK_LOW_WATER = 0.9
+DIFF_STORE_ENABLED = os.getenv("DIFF_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def diff_key(repo, base_sha, head_sha, kind="pr"):
+    # PR diffs keep the original key; other kinds (e.g. "compare") get their own key space
+    prefix = "" if kind == "pr" else f"{kind}\n"
+    return hashlib.sha256(f"{prefix}{repo}\n{base_sha}\n{head_sha}".encode()).hexdigest()
+
+
+def _compress(text):
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return ".zst", zstandard.ZstdCompressor(level=10).compress(data)
+    return ".zz", zlib.compress(data, 6)
+
+
+def _decompress(path, blob):
+    if path.endswith(".zst"):
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class DiffStore:
+    """
+    Content-addressed store of unified diffs keyed by (repo, base_sha, head_sha) and
+    kind: "pr" for PR diffs, "compare" for diffs between two pushed heads.
+
+    A diff for a fixed pair of SHAs never changes, so entries never need revalidating.
+    Hot diffs live in an in-memory LRU tier; everything is also kept compressed on
+    disk, oldest-used files being evicted once the directory exceeds max_disk_bytes
+    until it is back under DISK_LOW_WATER of it.
+    """
+
+    def __init__(self, root=DIFF_STORE_DIR, max_disk_bytes=DIFF_STORE_MAX_BYTES,
+                 max_memory_bytes=DIFF_MEMORY_MAX_BYTES):
+        self.root = root
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def _paths(self, key):
+        folder = os.path.join(self.root, key[:2])
+        return [os.path.join(folder, key + ext) for ext in (".zst", ".zz")]
+
+    def _disk_entries(self):
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _remember(self, key, text):
+        # Budgeted in UTF-8 bytes like max_memory_bytes, not characters
+        size = len(text.encode("utf-8"))
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (text, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted
+
+    def get(self, repo, base_sha, head_sha, kind="pr"):
+        key = diff_key(repo, base_sha, head_sha, kind)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key][0]
+        for path in self._paths(key):
+            if path.endswith(".zst") and zstandard is None:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    text = _decompress(path, f.read())
+            except FileNotFoundError:
+                continue
+            # mtime doubles as last-access time for disk eviction
+            os.utime(path)
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, text)
+            return text
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, repo, base_sha, head_sha, text, kind="pr"):
+        key = diff_key(repo, base_sha, head_sha, kind)
+        ext, blob = _compress(text)
+        path = os.path.join(self.root, key[:2], key + ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A rewrite of an existing entry replaces its bytes instead of adding to them
+        replaced = 0
+        for old_path in self._paths(key):
+            try:
+                replaced += os.path.getsize(old_path)
+                if old_path != path:
+                    os.remove(old_path)
+            except FileNotFoundError:
+                pass
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._remember(key, text)
+            self._disk_bytes += len(blob) - replaced
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        self._disk_bytes = sum(size for _, size, _ in entries)
+        low_water = self.max_disk_bytes * DISK_LOW_WATER
+        for path, size, _ in entries:
+            if self._disk_bytes <= low_water:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._disk_bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "codec": "zstd" if zstandard is not None else "zlib",
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_diff_store():
+    """
+    Returns the shared DiffStore, or None when DIFF_STORE_ENABLED is off.
+    """
+    global _store
+    if not DIFF_STORE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DiffStore()
+    return _store
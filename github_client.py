@@ -0,0 +1,197 @@
+import os
+import threading
+import httpx
+from http_cache import cache_key, get_http_cache
+from github_rate_limit import GITHUB_MAX_RETRIES, get_governor
+from telemetry import stage, record_github_response
+from dotenv import load_dotenv
+load_dotenv()
+
+# Shared connection pool settings for every GitHub call (Streamlit app and webhook server)
+GITHUB_POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "20"))
+GITHUB_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT", "30"))
+GITHUB_CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "10"))
+GITHUB_HTTP2 = os.getenv("GITHUB_HTTP2", "false").lower() in ("1", "true", "yes")
+
+
+def _client_options(pool_size, timeout, connect_timeout, http2):
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("⚠️ GITHUB_HTTP2 is set but the 'h2' package is missing, falling back to HTTP/1.1")
+            http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+        ),
+        "timeout": httpx.Timeout(timeout, connect=connect_timeout),
+        "http2": http2,
+        "verify": False,
+    }
+
+
+def _build_headers(token, accept, headers):
+    merged = {}
+    if token:
+        merged["Authorization"] = f"Bearer {token}"
+    if accept:
+        merged["Accept"] = accept
+    if headers:
+        merged.update(headers)
+    return merged
+
+
+def _prepare_conditional(cache, request):
+    """
+    Adds If-None-Match/If-Modified-Since to a GET we hold a cached copy of.
+    """
+    if cache is None or request.method != "GET":
+        return None, None
+    key = cache_key(request.method, str(request.url), request.headers.get("accept"),
+                    request.headers.get("authorization"))
+    entry = cache.lookup(key)
+    if entry:
+        request.headers.update(cache.validators(entry))
+    return key, entry
+
+
+def _apply_cache(cache, key, entry, request, response):
+    # GitHub does not count 304s against the primary rate limit, so replay the stored body
+    if key is None:
+        return response
+    if response.status_code == 304 and entry:
+        cache.record_hit(key)
+        return httpx.Response(entry["status"], headers=entry["headers"], content=entry["body"], request=request)
+    if response.status_code == 200:
+        cache.store(key, response.status_code, dict(response.headers), response.content)
+    return response
+
+
+class GitHubClient:
+    """
+    Keep-alive, pooled HTTP client for the GitHub REST API.
+
+    GET responses are revalidated against `cache` (an HTTPCache) when one is given.
+    With a `governor` (RateLimitGovernor), requests wait for rate-limit budget and
+    rate-limited responses are retried after the wait GitHub asks for.
+    """
+
+    def __init__(self, pool_size=GITHUB_POOL_SIZE, timeout=GITHUB_TIMEOUT,
+                 connect_timeout=GITHUB_CONNECT_TIMEOUT, http2=GITHUB_HTTP2, cache=None, governor=None):
+        self._http = httpx.Client(**_client_options(pool_size, timeout, connect_timeout, http2))
+        self.cache = cache
+        self.governor = governor
+
+    def _send(self, request, token):
+        if self.governor is not None:
+            self.governor.acquire(token, request.url)
+        response = None
+        try:
+            with stage("github_request", method=request.method, path=request.url.path):
+                response = self._http.send(request)
+            record_github_response(request.method, response)
+        finally:
+            if self.governor is not None:
+                self.governor.release(token, request.url, response)
+        return response
+
+    def request(self, method, url, token=None, accept=None, headers=None, **kwargs):
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            request = self._http.build_request(method, url, headers=_build_headers(token, accept, headers), **kwargs)
+            key, entry = _prepare_conditional(self.cache, request)
+            response = self._send(request, token)
+            if self.governor is None or attempt == GITHUB_MAX_RETRIES:
+                break
+            if self.governor.retry_delay(token, request.url, response, attempt) is None:
+                break
+        return _apply_cache(self.cache, key, entry, request, response)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self._http.close()
+
+
+class AsyncGitHubClient:
+    """
+    asyncio flavor of GitHubClient, used by the webhook server.
+    """
+
+    def __init__(self, pool_size=GITHUB_POOL_SIZE, timeout=GITHUB_TIMEOUT,
+                 connect_timeout=GITHUB_CONNECT_TIMEOUT, http2=GITHUB_HTTP2, cache=None, governor=None):
+        self._http = httpx.AsyncClient(**_client_options(pool_size, timeout, connect_timeout, http2))
+        self.cache = cache
+        self.governor = governor
+
+    async def _send(self, request, token):
+        if self.governor is not None:
+            await self.governor.acquire_async(token, request.url)
+        response = None
+        try:
+            with stage("github_request", method=request.method, path=request.url.path):
+                response = await self._http.send(request)
+            record_github_response(request.method, response)
+        finally:
+            if self.governor is not None:
+                self.governor.release(token, request.url, response)
+        return response
+
+    async def request(self, method, url, token=None, accept=None, headers=None, **kwargs):
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            request = self._http.build_request(method, url, headers=_build_headers(token, accept, headers), **kwargs)
+            key, entry = _prepare_conditional(self.cache, request)
+            response = await self._send(request, token)
+            if self.governor is None or attempt == GITHUB_MAX_RETRIES:
+                break
+            if self.governor.retry_delay(token, request.url, response, attempt) is None:
+                break
+        return _apply_cache(self.cache, key, entry, request, response)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+_client = None
+_async_client = None
+_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide GitHubClient, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = GitHubClient(cache=get_http_cache(), governor=get_governor())
+    return _client
+
+
+def get_async_client():
+    """
+    Returns the process-wide AsyncGitHubClient. Must be used from a single event loop.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncGitHubClient(cache=get_http_cache(), governor=get_governor())
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
@@ -0,0 +1,231 @@
+import os
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+load_dotenv()
+
+GITHUB_RATE_LIMIT_ENABLED = os.getenv("GITHUB_RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Requests in flight per token and rate-limit resource while the budget is healthy
+GITHUB_MAX_IN_FLIGHT = int(os.getenv("GITHUB_MAX_IN_FLIGHT", "10"))
+# Below this fraction of the hourly budget, concurrency shrinks proportionally down to 1
+GITHUB_THROTTLE_BELOW = float(os.getenv("GITHUB_THROTTLE_BELOW", "0.2"))
+# Requests kept in reserve; at or below it callers sleep until the budget resets
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "5"))
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "5"))
+
+# Local thread state: the callback reporting waits to whoever is blocked (e.g. a Streamlit placeholder)
+_local = threading.local()
+
+
+def _resource(url):
+    path = urlsplit(str(url)).path
+    if path.endswith("/graphql"):
+        return "graphql"
+    if "/search/" in path:
+        return "search"
+    return "core"
+
+
+def _key(token, url):
+    # Budgets are per token; only a hash of it is kept
+    return hashlib.sha256((token or "").encode()).hexdigest()[:12], _resource(url)
+
+
+@contextmanager
+def wait_listener(callback):
+    """
+    Calls callback(status) roughly every second while the current thread sleeps
+    on a rate limit; status is the dict returned by RateLimitGovernor.waiting().
+    """
+    previous = getattr(_local, "callback", None)
+    _local.callback = callback
+    try:
+        yield
+    finally:
+        _local.callback = previous
+
+
+class RateLimitGovernor:
+    """
+    Tracks GitHub's X-RateLimit-* budget per token and resource (core, search, graphql).
+
+    acquire() admits a request when the budget allows: concurrency shrinks as the
+    remaining budget drops below GITHUB_THROTTLE_BELOW of the limit, callers sleep
+    until the reset once only the reserve is left, and everybody using a token waits
+    after a 429 or a secondary-rate-limit 403. Secondary limits also halve that
+    token's concurrency ceiling, which then grows back by one every 20 successes.
+    """
+
+    def __init__(self, max_in_flight=GITHUB_MAX_IN_FLIGHT, throttle_below=GITHUB_THROTTLE_BELOW,
+                 reserve=GITHUB_RATE_LIMIT_RESERVE):
+        self.max_in_flight = max_in_flight
+        self.throttle_below = throttle_below
+        self.reserve = reserve
+        self.waits = 0
+        self.retries = 0
+        self.secondary_limits = 0
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        if key not in self._state:
+            self._state[key] = {
+                "limit": None, "remaining": None, "reset": None, "in_flight": 0,
+                "ceiling": self.max_in_flight, "successes": 0, "paused_until": 0.0, "reason": None,
+            }
+        return self._state[key]
+
+    def _allowed(self, state):
+        allowed = state["ceiling"]
+        if state["limit"] and state["remaining"] is not None:
+            fraction = state["remaining"] / (state["limit"] * self.throttle_below)
+            if fraction < 1:
+                allowed = max(1, int(allowed * fraction))
+        return allowed
+
+    def _try_acquire(self, key):
+        # Returns 0 when the request may go ahead, otherwise how long to wait
+        with self._lock:
+            state = self._get(key)
+            now = time.time()
+            if now < state["paused_until"]:
+                return state["paused_until"] - now
+            if (state["remaining"] is not None and state["remaining"] <= self.reserve
+                    and state["reset"] and state["reset"] > now):
+                self.waits += 1
+                state["paused_until"] = state["reset"] + 1
+                state["reason"] = f"{key[1]} rate limit exhausted"
+                return state["paused_until"] - now
+            if state["in_flight"] >= self._allowed(state):
+                return 0.05
+            state["in_flight"] += 1
+            return 0
+
+    def acquire(self, token, url):
+        key = _key(token, url)
+        while True:
+            delay = self._try_acquire(key)
+            if not delay:
+                return
+            callback = getattr(_local, "callback", None)
+            if callback is not None and delay >= 1:
+                callback(self.waiting())
+            time.sleep(min(delay, 1.0))
+
+    async def acquire_async(self, token, url):
+        key = _key(token, url)
+        while True:
+            delay = self._try_acquire(key)
+            if not delay:
+                return
+            await asyncio.sleep(min(delay, 1.0))
+
+    def release(self, token, url, response):
+        """
+        Frees the request's slot and records the budget reported by the response.
+        """
+        with self._lock:
+            state = self._get(_key(token, url))
+            state["in_flight"] = max(0, state["in_flight"] - 1)
+            if response is None:
+                return
+            headers = response.headers
+            if headers.get("x-ratelimit-remaining") is not None:
+                state["limit"] = int(headers.get("x-ratelimit-limit") or 0) or state["limit"]
+                state["remaining"] = int(headers["x-ratelimit-remaining"])
+                state["reset"] = float(headers.get("x-ratelimit-reset") or 0) or state["reset"]
+            if response.status_code < 400:
+                state["successes"] += 1
+                if state["successes"] % 20 == 0 and state["ceiling"] < self.max_in_flight:
+                    state["ceiling"] += 1
+
+    def retry_delay(self, token, url, response, attempt):
+        """
+        Seconds to wait before retrying a rate-limited response, or None when the
+        response is not rate limited. Also pauses every caller of the same token.
+        """
+        if response is None or response.status_code not in (403, 429):
+            return None
+        headers = response.headers
+        exhausted = headers.get("x-ratelimit-remaining") == "0"
+        secondary = "secondary rate limit" in response.text.lower() or "abuse" in response.text.lower()
+        if response.status_code == 403 and not (exhausted or secondary or headers.get("retry-after")):
+            return None  # a real permission error
+
+        if headers.get("retry-after"):
+            delay = float(headers["retry-after"])
+        elif exhausted and headers.get("x-ratelimit-reset"):
+            delay = max(1.0, float(headers["x-ratelimit-reset"]) - time.time() + 1)
+        else:
+            # No hint from GitHub: back off exponentially from a minute, with jitter
+            delay = min(900, 60 * 2 ** attempt)
+        delay += random.uniform(0, 1 + delay * 0.1)
+
+        with self._lock:
+            self.retries += 1
+            key = _key(token, url)
+            state = self._get(key)
+            if not exhausted:
+                self.secondary_limits += 1
+                state["ceiling"] = max(1, state["ceiling"] // 2)
+                state["successes"] = 0
+            state["paused_until"] = max(state["paused_until"], time.time() + delay)
+            state["reason"] = f"{key[1]} rate limit exhausted" if exhausted else "secondary rate limit"
+        return delay
+
+    def waiting(self):
+        """
+        {"reason", "seconds", "until"} of the longest current rate-limit wait, or None.
+        """
+        with self._lock:
+            now = time.time()
+            paused = [state for state in self._state.values() if state["paused_until"] > now]
+            if not paused:
+                return None
+            longest = max(paused, key=lambda state: state["paused_until"])
+            return {
+                "reason": longest["reason"],
+                "seconds": round(longest["paused_until"] - now),
+                "until": longest["paused_until"],
+            }
+
+    def stats(self):
+        with self._lock:
+            budgets = [{
+                "token": token_hash[:8],
+                "resource": resource,
+                "remaining": state["remaining"],
+                "limit": state["limit"],
+                "reset": state["reset"],
+                "in_flight": state["in_flight"],
+                "allowed_in_flight": self._allowed(state),
+            } for (token_hash, resource), state in self._state.items()]
+            return {
+                "waits": self.waits,
+                "retries": self.retries,
+                "secondary_limits": self.secondary_limits,
+                "budgets": budgets,
+            }
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """
+    Returns the shared RateLimitGovernor, or None when GITHUB_RATE_LIMIT_ENABLED is off.
+    """
+    global _governor
+    if not GITHUB_RATE_LIMIT_ENABLED:
+        return None
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = RateLimitGovernor()
+    return _governor
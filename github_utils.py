@@ -1,57 +1,114 @@
-import requests
 from datetime import datetime
 import os
+from github_client import get_client, get_async_client
+from diff_store import get_diff_store
 from dotenv import load_dotenv
 load_dotenv()
 GITHUB_API = os.getenv("GITHUB_API")
+# The compare API lists at most this many changed files
+COMPARE_MAX_FILES = 300
 
-def fetch_prs(repo, token, since, until, state):
+def iter_prs(repo, token, since, until, state):
+    """
+    Yields PRs page by page, following the `Link` header, newest update first.
+
+    Stops paging as soon as a PR's `updated_at` falls before `since`, since
+    nothing older can have been created or merged inside the window.
+    """
     url = f"{GITHUB_API}/repos/{repo}/pulls"
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {"state": {state}, "sort": "updated", "direction": "desc", "per_page": 100}
-    
-    response = requests.get(url, headers=headers, params=params, verify=False)
-    all_prs = response.json()
-    # print("prs: ", all_prs)
-    if state == "closed":
-        all_prs = [
-            pr for pr in all_prs
-            if pr["merged_at"] and since <= pr["merged_at"] <= until
-            ]
-        
-    return all_prs
+    params = {"state": state, "sort": "updated", "direction": "desc", "per_page": 100}
+
+    while url:
+        response = get_client().get(url, token=token, params=params)
+        response.raise_for_status()
+        for pr in response.json():
+            if pr["updated_at"] < since:
+                return
+            if state == "closed" and not (pr["merged_at"] and since <= pr["merged_at"] <= until):
+                continue
+            yield pr
+        # The "next" link already carries the query string
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+def fetch_prs(repo, token, since, until, state):
+    return list(iter_prs(repo, token, since, until, state))
+
+def get_diff(repo, pr_number, token, base_sha=None, head_sha=None):
+    """
+    Returns the unified diff of a PR.
+
+    When base_sha/head_sha are given the diff is served from the local DiffStore,
+    since the diff of a fixed pair of commits never changes.
+    """
+    store = get_diff_store() if base_sha and head_sha else None
+    if store is not None:
+        cached = store.get(repo, base_sha, head_sha)
+        if cached is not None:
+            return cached
 
-def get_diff(repo, pr_number, token):
     url = f"{GITHUB_API}/repos/{repo}/pulls/{pr_number}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3.diff"
-    }
-    response = requests.get(url, headers=headers, verify=False)
+    response = get_client().get(url, token=token, accept="application/vnd.github.v3.diff")
+    # An error body (e.g. after rate-limit retries gave up) must never be taken for a diff
+    response.raise_for_status()
+    if store is not None:
+        store.put(repo, base_sha, head_sha, response.text)
     return response.text
 
-def find_all_repo_names(data):
-    result = []
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if key == "full_name":
-                result.append(value)
-            elif isinstance(value, (dict, list)):
-                result.extend(find_all_repo_names(value))
-    elif isinstance(data, list):
-        for item in data:
-            result.extend(find_all_repo_names(item))
-    return result
+async def aget_diff(repo, pr_number, token, base_sha=None, head_sha=None):
+    store = get_diff_store() if base_sha and head_sha else None
+    if store is not None:
+        cached = store.get(repo, base_sha, head_sha)
+        if cached is not None:
+            return cached
+
+    url = f"{GITHUB_API}/repos/{repo}/pulls/{pr_number}"
+    response = await get_async_client().get(url, token=token, accept="application/vnd.github.v3.diff")
+    # An error body (e.g. after rate-limit retries gave up) must never be taken for a diff
+    response.raise_for_status()
+    if store is not None:
+        store.put(repo, base_sha, head_sha, response.text)
+    return response.text
+
+async def aget_compare(repo, base_sha, head_sha, token):
+    """
+    Returns the compare JSON between two commits (status, ahead_by, files...), or None
+    when either commit no longer exists, e.g. after a force-push.
+    """
+    url = f"{GITHUB_API}/repos/{repo}/compare/{base_sha}...{head_sha}"
+    response = await get_async_client().get(url, token=token, accept="application/vnd.github+json")
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+async def aget_compare_diff(repo, base_sha, head_sha, token):
+    store = get_diff_store()
+    if store is not None:
+        cached = store.get(repo, base_sha, head_sha, kind="compare")
+        if cached is not None:
+            return cached
+
+    url = f"{GITHUB_API}/repos/{repo}/compare/{base_sha}...{head_sha}"
+    response = await get_async_client().get(url, token=token, accept="application/vnd.github.v3.diff")
+    response.raise_for_status()
+    if store is not None:
+        store.put(repo, base_sha, head_sha, response.text, kind="compare")
+    return response.text
 
 def fetch_org_repos(org, token):
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+    """
+    Returns the full names of every repository in the org, following the `Link` header.
+    """
     url = f"{GITHUB_API}/orgs/{org}/repos"
-    response = requests.get(url, headers=headers, verify=False)
-    data = response.json()
-    repos = find_all_repo_names(data)
+    params = {"per_page": 100}
+    repos = []
+    while url:
+        response = get_client().get(url, token=token, accept="application/vnd.github.v3+json", params=params)
+        response.raise_for_status()
+        repos.extend(repo["full_name"] for repo in response.json())
+        url = response.links.get("next", {}).get("url")
+        params = None
     return repos
 
 def fetch_codeql_alerts(repo, token, state="open"):
@@ -59,16 +116,12 @@ def fetch_codeql_alerts(repo, token, state="open"):
     Fetches CodeQL alerts for a given GitHub repository.
     """
     url = f"{GITHUB_API}/repos/{repo}/code-scanning/alerts"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json"
-    }
     params = {
         "state": state,
         "per_page": 100
     }
 
-    response = requests.get(url, headers=headers, params=params, verify=False)
+    response = get_client().get(url, token=token, accept="application/vnd.github+json", params=params)
     
     if response.status_code == 200:
         print("codeql: ", response.json())
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(CACHE_DIR, "webhook_jobs.sqlite3"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Finished jobs are kept this long for inspection, then purged
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+
+class JobQueue:
+    """
+    Persistent FIFO of webhook jobs stored in SQLite, so queued work survives restarts.
+
+    Job status goes pending -> running -> done/failed. Failed attempts go back to
+    pending with a backoff until max_attempts is reached. Jobs sharing a
+    coalesce_key replace each other: a newer job marks older pending ones
+    'superseded', and running ones can be marked 'cancelled'.
+    """
+
+    def __init__(self, path=JOB_QUEUE_PATH, max_attempts=JOB_MAX_ATTEMPTS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT,
+                payload TEXT,
+                status TEXT,
+                attempts INTEGER DEFAULT 0,
+                error TEXT,
+                run_after REAL,
+                created_at REAL,
+                updated_at REAL
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if "coalesce_key" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN coalesce_key TEXT")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reviewed_heads (
+                coalesce_key TEXT PRIMARY KEY,
+                head_sha TEXT,
+                reviewed_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, run_after)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_coalesce_key ON jobs (coalesce_key, status)")
+
+    def enqueue(self, kind, payload, delay=0, coalesce_key=None):
+        """
+        Adds a job runnable after `delay` seconds; returns (job_id, superseded),
+        where superseded is how many pending jobs with the same coalesce_key it replaced.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                superseded = 0
+                if coalesce_key is not None:
+                    superseded = self._conn.execute(
+                        "UPDATE jobs SET status = 'superseded', updated_at = ? "
+                        "WHERE coalesce_key = ? AND status = 'pending'",
+                        (now, coalesce_key),
+                    ).rowcount
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs (kind, payload, status, run_after, created_at, updated_at, coalesce_key) "
+                    "VALUES (?, ?, 'pending', ?, ?, ?, ?)",
+                    (kind, json.dumps(payload), now + delay, now, now, coalesce_key),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.lastrowid, superseded
+
+    def is_stale(self, job_id, coalesce_key):
+        """
+        True when a newer job for the same coalesce_key has been enqueued.
+        """
+        if coalesce_key is None:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE coalesce_key = ? AND id > ? LIMIT 1", (coalesce_key, job_id)
+            ).fetchone()
+        return row is not None
+
+    def claim(self):
+        """
+        Marks the oldest runnable pending job as running and returns it, or None.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, kind, payload, attempts, coalesce_key FROM jobs "
+                    "WHERE status = 'pending' AND run_after <= ? ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, kind, payload, attempts, coalesce_key = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "payload": json.loads(payload),
+            "attempts": attempts + 1,
+            "coalesce_key": coalesce_key,
+        }
+
+    def complete(self, job_id):
+        self._set_status(job_id, "done")
+
+    def cancel(self, job_id):
+        self._set_status(job_id, "cancelled")
+
+    def fail(self, job_id, error):
+        now = time.time()
+        with self._lock:
+            attempts = self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            if attempts < self.max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'pending', error = ?, run_after = ?, updated_at = ? WHERE id = ?",
+                    (error, now + 2 ** attempts * 5, now, job_id),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                    (error, now, job_id),
+                )
+
+    def _set_status(self, job_id, status):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), job_id)
+            )
+
+    def last_reviewed_sha(self, coalesce_key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT head_sha FROM reviewed_heads WHERE coalesce_key = ?", (coalesce_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record_review(self, coalesce_key, head_sha):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reviewed_heads VALUES (?, ?, ?)", (coalesce_key, head_sha, time.time())
+            )
+
+    def recover(self):
+        """
+        Requeues jobs left running by a previous process and purges old finished jobs.
+        """
+        now = time.time()
+        with self._lock:
+            recovered = self._conn.execute(
+                "UPDATE jobs SET status = 'pending', updated_at = ? WHERE status = 'running'", (now,)
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed', 'superseded', 'cancelled') AND updated_at < ?",
+                (now - JOB_RETENTION_SECONDS,),
+            )
+        return recovered
+
+    def depth(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0, "superseded": 0, "cancelled": 0}
+        counts.update(dict(rows))
+        return counts
@@ -0,0 +1,123 @@
+import os
+import time
+import asyncio
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+# Account-level OpenAI budgets shared by every caller in this process
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "30000"))
+
+
+class TokenBucketScheduler:
+    """
+    Token-bucket limiter enforcing requests-per-minute and tokens-per-minute budgets.
+
+    Callers block in acquire()/acquire_async() until both buckets can cover the
+    request, so excess work queues up instead of failing with 429s. pause() stops
+    everybody, e.g. for the duration of a `retry-after`.
+    """
+
+    def __init__(self, rpm=OPENAI_RPM, tpm=OPENAI_TPM):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.waits = 0
+        self.seconds_waited = 0.0
+        self.pauses = 0
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _try_acquire(self, tokens):
+        # Returns 0 when the request may go ahead, otherwise how long to wait
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            # A request larger than the whole budget just waits for a full bucket
+            tokens = min(tokens, self.tpm)
+            if self._requests >= 1 and self._tokens >= tokens:
+                self._requests -= 1
+                self._tokens -= tokens
+                return 0
+            return max(
+                (1 - self._requests) * 60 / self.rpm,
+                (tokens - self._tokens) * 60 / self.tpm,
+                0.01,
+            )
+
+    def _count_wait(self, started):
+        # Once per throttled request, however many times it polled the buckets
+        with self._lock:
+            self.waits += 1
+            self.seconds_waited += time.monotonic() - started
+
+    def acquire(self, tokens):
+        started = None
+        while True:
+            delay = self._try_acquire(tokens)
+            if not delay:
+                break
+            started = started or time.monotonic()
+            time.sleep(delay)
+        if started is not None:
+            self._count_wait(started)
+
+    async def acquire_async(self, tokens):
+        started = None
+        while True:
+            delay = self._try_acquire(tokens)
+            if not delay:
+                break
+            started = started or time.monotonic()
+            await asyncio.sleep(delay)
+        if started is not None:
+            self._count_wait(started)
+
+    def settle(self, estimated, actual):
+        """
+        Corrects the token bucket once the real usage of a request is known.
+        """
+        with self._lock:
+            self._tokens = min(self.tpm, self._tokens + estimated - actual)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.pauses += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "requests_available": int(self._requests),
+                "tokens_available": int(self._tokens),
+                "waits": self.waits,
+                "seconds_waited": round(self.seconds_waited, 1),
+                "pauses": self.pauses,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = TokenBucketScheduler()
+    return _scheduler
@@ -1,59 +1,236 @@
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import pandas as pd
+from github_client import get_client
 from dotenv import load_dotenv
 load_dotenv()
 
 GITHUB_API = os.getenv("GITHUB_API")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+# "graphql" fetches metrics for a batch of PRs per query; "rest" makes three calls per PR
+METRICS_LOADER = os.getenv("METRICS_LOADER", "graphql").lower()
+# PRs per GraphQL query; GitHub caps a query at 500,000 nodes, 100 comments x 100 PRs stays well under
+GRAPHQL_BATCH_SIZE = int(os.getenv("GRAPHQL_BATCH_SIZE", "50"))
+# Metrics requests in flight at once per repo
+METRICS_CONCURRENCY = int(os.getenv("METRICS_CONCURRENCY", os.getenv("GITHUB_CONCURRENCY", "8")))
+
+
+def _graphql_url():
+    if os.getenv("GITHUB_GRAPHQL_API"):
+        return os.getenv("GITHUB_GRAPHQL_API")
+    api = (GITHUB_API or "https://api.github.com").rstrip("/")
+    # GitHub Enterprise serves REST under /api/v3 and GraphQL under /api/graphql
+    if api.endswith("/api/v3"):
+        return api[:-len("/v3")] + "/graphql"
+    return api + "/graphql"
+
+
+PR_METRICS_FIELDS = """
+    number
+    additions
+    deletions
+    comments(first: 100) {
+      pageInfo { hasNextPage endCursor }
+      nodes { author { login } }
+    }
+    reviews(first: 100) {
+      pageInfo { hasNextPage endCursor }
+      nodes { submittedAt comments { totalCount } }
+    }
+"""
 
 def get_pr_comments(repo, pr_number):
     url = f"{GITHUB_API}/repos/{repo}/issues/{pr_number}/comments"
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
-    response = requests.get(url, headers=headers, verify=False)
+    response = get_client().get(url, token=GITHUB_TOKEN)
     return response.json()
 
 def get_pr_timeline(repo, pr_number):
     url = f"{GITHUB_API}/repos/{repo}/issues/{pr_number}/timeline"
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.mockingbird-preview"
-    }
-    response = requests.get(url, headers=headers, verify=False)
+    response = get_client().get(url, token=GITHUB_TOKEN, accept="application/vnd.github.mockingbird-preview")
     return response.json()
 
 def get_pr_diff_stats(repo, pr_number):
     url = f"{GITHUB_API}/repos/{repo}/pulls/{pr_number}"
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
-    response = requests.get(url, headers=headers, verify=False)
+    response = get_client().get(url, token=GITHUB_TOKEN)
     return response.json()
 
-def analyze_pr_metrics(repo, prs):
+def graphql(query, variables=None):
+    response = get_client().post(_graphql_url(), token=GITHUB_TOKEN, json={"query": query, "variables": variables or {}})
+    response.raise_for_status()
+    body = response.json()
+    if body.get("errors") and not body.get("data"):
+        raise RuntimeError(f"GitHub GraphQL error: {body['errors'][0].get('message')}")
+    return body["data"]
+
+
+def _login(node):
+    # Deleted accounts come back as a null author
+    return (node.get("author") or {}).get("login") or "ghost"
+
+
+def _more_nodes(owner, name, pr_number, connection, fields, cursor):
+    # Remaining pages of one PR connection (e.g. "comments") past the first 100 nodes
+    query = f"""
+        query($owner: String!, $name: String!, $number: Int!, $cursor: String!) {{
+          repository(owner: $owner, name: $name) {{
+            pullRequest(number: $number) {{
+              {connection}(first: 100, after: $cursor) {{
+                pageInfo {{ hasNextPage endCursor }}
+                nodes {{ {fields} }}
+              }}
+            }}
+          }}
+        }}
+    """
+    nodes = []
+    while cursor:
+        data = graphql(query, {"owner": owner, "name": name, "number": pr_number, "cursor": cursor})
+        page = data["repository"]["pullRequest"][connection]
+        nodes.extend(page["nodes"])
+        cursor = page["pageInfo"]["endCursor"] if page["pageInfo"]["hasNextPage"] else None
+    return nodes
+
+
+def _all_nodes(owner, name, pr_number, node, connection, fields):
+    page = node[connection]
+    nodes = list(page["nodes"])
+    if page["pageInfo"]["hasNextPage"]:
+        nodes.extend(_more_nodes(owner, name, pr_number, connection, fields, page["pageInfo"]["endCursor"]))
+    return nodes
+
+
+def _unavailable(error):
+    return {
+        "additions": 0, "deletions": 0, "comments": 0, "review_comments": 0,
+        "commenters": [], "first_review_at": None, "error": error,
+    }
+
+
+def fetch_pr_metrics_graphql(repo, pr_numbers):
+    """
+    Loads additions, deletions, comment authors, review comment counts and the first
+    submitted review of several PRs with one GraphQL query (aliased pullRequest fields).
+    PRs with more than 100 comments or reviews are paged with the connection cursor.
+
+    Returns {pr_number: enrichment}; PRs the query could not resolve are left out.
+    """
+    owner, name = repo.split("/", 1)
+    fields = "\n".join(
+        f"pr{number}: pullRequest(number: {number}) {{{PR_METRICS_FIELDS}}}" for number in pr_numbers
+    )
+    query = f"""
+        query($owner: String!, $name: String!) {{
+          repository(owner: $owner, name: $name) {{
+            {fields}
+          }}
+        }}
+    """
+    data = graphql(query, {"owner": owner, "name": name})
+    results = {}
+    for number in pr_numbers:
+        node = (data.get("repository") or {}).get(f"pr{number}")
+        if node is None:
+            continue
+        commenters = [_login(comment) for comment in
+                      _all_nodes(owner, name, number, node, "comments", "author { login }")]
+        reviews = _all_nodes(owner, name, number, node, "reviews", "submittedAt comments { totalCount }")
+        # Pending reviews have no submittedAt yet
+        submitted = [review["submittedAt"] for review in reviews if review.get("submittedAt")]
+        results[number] = {
+            "additions": node.get("additions", 0),
+            "deletions": node.get("deletions", 0),
+            "comments": len(commenters),
+            "review_comments": sum(review["comments"]["totalCount"] for review in reviews),
+            "commenters": commenters,
+            "first_review_at": min(submitted) if submitted else None,
+            "error": None,
+        }
+    return results
+
+
+def _fetch_pr_metrics_rest(repo, pr_number):
+    comments = get_pr_comments(repo, pr_number)
+    timeline = get_pr_timeline(repo, pr_number)
+    pr_details = get_pr_diff_stats(repo, pr_number)
+
+    first_review_at = None
+    for event in timeline:
+        if event['event'] == 'reviewed':
+            first_review_at = event['submitted_at']
+            break
+
+    return {
+        "additions": pr_details.get('additions', 0),
+        "deletions": pr_details.get('deletions', 0),
+        "comments": pr_details.get('comments', len(comments)),
+        "review_comments": pr_details.get('review_comments', 0),
+        "commenters": [c['user']['login'] for c in comments],
+        "first_review_at": first_review_at,
+        "error": None,
+    }
+
+
+def enrich_prs(repo, prs, loader=None, concurrency=None):
+    """
+    Fetches every PR's details, comments and first review exactly once, with at most
+    `concurrency` requests in flight (one GraphQL batch or one REST PR per request).
+
+    Returns {pr_number: enrichment} for add_pr_analytics and analyze_pr_metrics to
+    share. A PR whose fetch failed still gets an entry, with zeroed counts and its
+    "error", so one slow or broken PR degrades its own row instead of the whole repo.
+    """
+    pr_numbers = [pr['number'] for pr in prs]
+    if (loader or METRICS_LOADER) == "rest":
+        units = [[number] for number in pr_numbers]
+        fetch = lambda unit: {unit[0]: _fetch_pr_metrics_rest(repo, unit[0])}
+    else:
+        units = [pr_numbers[i:i + GRAPHQL_BATCH_SIZE] for i in range(0, len(pr_numbers), GRAPHQL_BATCH_SIZE)]
+        fetch = lambda unit: fetch_pr_metrics_graphql(repo, unit)
+
+    enrichment = {}
+    if not units:
+        return enrichment
+    with ThreadPoolExecutor(max_workers=min(len(units), concurrency or METRICS_CONCURRENCY)) as pool:
+        futures = {pool.submit(fetch, unit): unit for unit in units}
+        for future in as_completed(futures):
+            unit = futures[future]
+            try:
+                loaded, error = future.result(), "not found"
+            except Exception as e:
+                print(f"⚠️ Failed to load metrics for {repo} PR(s) {', '.join(map(str, unit))}: {e}")
+                loaded, error = {}, str(e)
+            for number in unit:
+                enrichment[number] = loaded.get(number) or _unavailable(error)
+    return enrichment
+
+
+def analyze_pr_metrics(repo, prs, loader=None, enrichment=None):
+    prs = list(prs)
+    if enrichment is None:
+        enrichment = enrich_prs(repo, prs, loader)
+
     metrics = []
     for pr in prs:
         pr_number = pr['number']
         pr_url = pr['html_url']  # <- Add this line
 
         created = datetime.fromisoformat(pr['created_at'].replace('Z', '+00:00'))
-        merged = datetime.fromisoformat(pr['merged_at'].replace('Z', '+00:00')) if pr['merged_at'] else None
 
-        comments = get_pr_comments(repo, pr_number)
-        timeline = get_pr_timeline(repo, pr_number)
-        pr_details = get_pr_diff_stats(repo, pr_number)
-
-        reviewers = list(set([c['user']['login'] for c in comments]))
-        comment_count = len(comments)
-        lines_changed = pr_details.get('additions', 0) + pr_details.get('deletions', 0)
+        stats = enrichment.get(pr_number) or _unavailable("not loaded")
+        reviewers = list(set(stats["commenters"]))
+        comment_count = len(stats["commenters"])
+        lines_changed = stats["additions"] + stats["deletions"]
 
         first_review_time = None
-        for event in timeline:
-            if event['event'] == 'reviewed':
-                first_review_time = datetime.fromisoformat(event['submitted_at'].replace('Z', '+00:00'))
-                break
+        if stats["first_review_at"]:
+            first_review_time = datetime.fromisoformat(stats["first_review_at"].replace('Z', '+00:00'))
 
         time_to_first_review = (first_review_time - created).total_seconds() / 3600 if first_review_time else None
 
+        if stats["error"]:
+            # Keep the PR listed, without numbers that would read as real zeros
+            lines_changed = comment_count = None
         metrics.append({
             "Repository": repo,
             "PR Number": f"[#{pr_number}]({pr_url})",  # <- Hyperlink format for Streamlit Markdown tables
@@ -62,24 +239,23 @@ def analyze_pr_metrics(repo, prs):
             "Comments": comment_count,
             "Reviewers": ", ".join(reviewers),
             "First Review (hrs)": round(time_to_first_review, 2) if time_to_first_review else "N/A",
-            "Merged Without Comments": "Yes" if comment_count == 0 else "No"
+            "Merged Without Comments": "N/A" if stats["error"] else "Yes" if comment_count == 0 else "No"
         })
 
     return pd.DataFrame(metrics)
 
 
-def add_pr_analytics(repo, all_prs):
-    # Fetch additions/deletions via per-PR API
-    print("repo variables....", repo)
-    # print("all_prs", all_prs)
-    for pr in all_prs:
-        pr_number = pr["number"]
-        print("1-additions...", pr_number)
-        pr_details = get_pr_diff_stats(repo, pr_number)
-        pr["additions"] = pr_details.get('additions', 0)
-        print("1-additions...", pr["additions"])
-        pr["deletions"] = pr_details.get('deletions', 0)
-        pr["comments"] = pr_details.get("comments", 0)
-        pr["review_comments"] = pr_details.get("review_comments", 0)
-
-    return all_prs
\ No newline at end of file
+def add_pr_analytics(repo, all_prs, enrichment=None):
+    # all_prs may be a lazy iterator (e.g. github_utils.iter_prs)
+    prs = list(all_prs)
+    if enrichment is None:
+        enrichment = enrich_prs(repo, prs)
+    for pr in prs:
+        stats = enrichment.get(pr["number"]) or _unavailable("not loaded")
+        pr["additions"] = stats["additions"]
+        pr["deletions"] = stats["deletions"]
+        pr["comments"] = stats["comments"]
+        pr["review_comments"] = stats["review_comments"]
+        if stats["error"]:
+            pr["metrics_error"] = stats["error"]
+    return prs
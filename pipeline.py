@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from github_utils import iter_prs, get_diff
+from github_rate_limit import get_governor
+from ai_summarizer import summarize_release_notes
+from dotenv import load_dotenv
+load_dotenv()
+
+# Per-backend limits: how many GitHub requests / model calls may be in flight at once
+GITHUB_CONCURRENCY = int(os.getenv("GITHUB_CONCURRENCY", "8"))
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "4"))
+
+
+def process_prs(repos, token, since, until, state, analyze, on_progress=None,
+                github_concurrency=GITHUB_CONCURRENCY, openai_concurrency=OPENAI_CONCURRENCY, list_prs=None,
+                on_result=None, on_poll=None, batcher=None):
+    """
+    Lists PRs of every repo and runs analyze(repo, pr, diff) on each one concurrently.
+
+    Work on a PR starts as soon as its listing page arrives. GitHub calls and model
+    calls are bounded separately. on_progress(done, total) is invoked on the calling
+    thread (safe for Streamlit) each time items complete, and periodically while a
+    GitHub rate-limit wait is in progress; total grows while repos are still being listed.
+
+    Returns (results, errors): results maps repo -> [(pr, output), ...] in listing
+    order, with output None when that PR failed; errors maps repo -> message for
+    repos whose listing failed.
+
+    list_prs(repo, since, until, state) replaces the GitHub listing, e.g. with
+    PRWarehouse.query_prs. on_result(repo, pr, output) is called on the calling thread
+    as soon as each PR finishes (output None on failure), and on_poll() about every
+    100ms, e.g. to render output that analyze streams from worker threads.
+
+    With a batcher (ai_summarizer.SummaryBatcher), diffs it accepts are summarized
+    through it, several per request, instead of by analyze. Their summaries are not
+    streamed: on_result gets each one whole once its batch is answered.
+    """
+    governor = get_governor()
+    github_slots = threading.BoundedSemaphore(github_concurrency)
+    openai_slots = threading.BoundedSemaphore(openai_concurrency)
+    results = {repo: [] for repo in repos}
+    errors = {}
+    submitted = queue.Queue()
+    owners = {}
+
+    def run(repo, pr):
+        with github_slots:
+            diff = get_diff(repo, pr["number"], token, pr["base"]["sha"], pr["head"]["sha"])
+        if batcher is not None and batcher.accepts(diff):
+            # Waits for its shared request without holding a model slot; the batch request
+            # and any single-call fallback each take one
+            return batcher.summarize(diff, repo=repo, pr_number=pr["number"], slot=openai_slots)
+        with openai_slots:
+            return analyze(repo, pr, diff)
+
+    # Workers waiting on a batch each hold a thread, so a batcher needs room for a full batch
+    extra = batcher.max_items if batcher is not None else 0
+    with ThreadPoolExecutor(max_workers=github_concurrency + openai_concurrency + extra) as workers, \
+            ThreadPoolExecutor(max_workers=max(1, min(len(repos), github_concurrency))) as listers:
+
+        def list_repo(repo):
+            listing = list_prs(repo, since, until, state) if list_prs else iter_prs(repo, token, since, until, state)
+            for pr in listing:
+                future = workers.submit(run, repo, pr)
+                owners[future] = (repo, pr)
+                results[repo].append((pr, future))
+                submitted.put(future)
+
+        listings = {listers.submit(list_repo, repo): repo for repo in repos}
+        pending = set()
+        total = done = 0
+        while True:
+            if on_poll:
+                on_poll()
+            while not submitted.empty():
+                pending.add(submitted.get())
+                total += 1
+            listing_done = all(listing.done() for listing in listings)
+            if not pending:
+                if listing_done and submitted.empty():
+                    break
+                wait([listing for listing in listings if not listing.done()], timeout=0.1,
+                     return_when=FIRST_COMPLETED)
+                continue
+            finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            done += len(finished)
+            if on_result:
+                for future in finished:
+                    repo, pr = owners[future]
+                    on_result(repo, pr, None if future.exception() is not None else future.result())
+            # Also report while workers sleep on a GitHub rate limit, so the wait is visible
+            if on_progress and (finished or (governor is not None and governor.waiting())):
+                on_progress(done, total)
+
+        for listing, repo in listings.items():
+            if listing.exception() is not None:
+                errors[repo] = str(listing.exception())
+
+    for repo, items in results.items():
+        resolved = []
+        for pr, future in items:
+            if future.exception() is not None:
+                print(f"⚠️ Failed to process PR #{pr['number']} in {repo}: {future.exception()}")
+                resolved.append((pr, None))
+            else:
+                resolved.append((pr, future.result()))
+        results[repo] = resolved
+    return results, errors
+
+
+def summarize_repos(repo_summaries, use_cache=True, openai_concurrency=OPENAI_CONCURRENCY, caller=None):
+    """
+    Runs summarize_release_notes on {repo: [PR summaries]} for several repos in
+    parallel; returns {repo: release notes}, None for repos whose notes failed.
+    """
+    if not repo_summaries:
+        return {}
+    with ThreadPoolExecutor(max_workers=openai_concurrency) as workers:
+        futures = {
+            repo: workers.submit(summarize_release_notes, summaries, use_cache=use_cache, repo=repo, caller=caller)
+            for repo, summaries in repo_summaries.items()
+        }
+    notes = {}
+    for repo, future in futures.items():
+        if future.exception() is not None:
+            print(f"⚠️ Failed to write release notes for {repo}: {future.exception()}")
+            notes[repo] = None
+        else:
+            notes[repo] = future.result()
+    return notes
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+# Column dtypes of the PR frame; categories keep repeated strings cheap and groupbys fast
+PR_FRAME_DTYPES = {
+    "number": "int64",
+    "title": "string",
+    "repository": "category",
+    "author": "category",
+    "state": "category",
+    "additions": "int64",
+    "deletions": "int64",
+    "comments": "int64",
+    "review_comments": "int64",
+}
+
+
+def build_pr_frame(prs):
+    """
+    Turns PR dicts (as enriched by add_pr_analytics) into one typed, columnar frame.
+
+    Timestamps are parsed once per column as UTC; merged_at is NaT for unmerged PRs.
+    """
+    prs = list(prs)
+    frame = pd.DataFrame({
+        "number": [pr["number"] for pr in prs],
+        "title": [pr.get("title") or "" for pr in prs],
+        "repository": [((pr.get("base") or {}).get("repo") or {}).get("name", "Unknown") for pr in prs],
+        "author": [pr["user"]["login"] for pr in prs],
+        "state": [pr.get("state") or "unknown" for pr in prs],
+        "created_at": [pr.get("created_at") for pr in prs],
+        "merged_at": [pr.get("merged_at") for pr in prs],
+        "additions": [pr.get("additions") or 0 for pr in prs],
+        "deletions": [pr.get("deletions") or 0 for pr in prs],
+        "comments": [pr.get("comments") or 0 for pr in prs],
+        "review_comments": [pr.get("review_comments") or 0 for pr in prs],
+    })
+    frame = frame.astype(PR_FRAME_DTYPES)
+    frame["created_at"] = pd.to_datetime(frame["created_at"], utc=True, format="ISO8601")
+    frame["merged_at"] = pd.to_datetime(frame["merged_at"], utc=True, format="ISO8601")
+    frame["size"] = frame["additions"] + frame["deletions"]
+    frame["review_hours"] = (frame["merged_at"] - frame["created_at"]).dt.total_seconds() / 3600
+    return frame
+
+
+def summary_metrics(frame):
+    merged = frame["merged_at"].notna().to_numpy()
+    state = frame["state"].to_numpy()
+    review_hours = frame["review_hours"].to_numpy()[merged]
+    return {
+        "total": len(frame),
+        "open": int(np.count_nonzero(state == "open")),
+        "merged": int(np.count_nonzero(merged)),
+        "closed_not_merged": int(np.count_nonzero((state == "closed") & ~merged)),
+        "avg_review_hours": float(review_hours.mean()) if len(review_hours) else 0.0,
+        "avg_size": float(frame["size"].mean()) if len(frame) else 0.0,
+        "avg_comments": float((frame["comments"] + frame["review_comments"]).mean()) if len(frame) else 0.0,
+        "merged_without_comments": int(np.count_nonzero(merged & (frame["review_comments"].to_numpy() == 0))),
+    }
+
+
+def timeline_frame(frame):
+    merged = frame[frame["merged_at"].notna()]
+    return pd.DataFrame({
+        "PR": "#" + merged["number"].astype("string") + " " + merged["title"].str.slice(0, 30) + "...",
+        "Repository": merged["repository"],
+        "Start": merged["created_at"],
+        "End": merged["merged_at"],
+        "Duration (hrs)": merged["review_hours"],
+    }).sort_values("Start")
+
+
+def size_frame(frame):
+    return pd.DataFrame({
+        "PR": "#" + frame["number"].astype("string"),
+        "Title": frame["title"],
+        "Size": frame["size"],
+        "Additions": frame["additions"],
+        "Deletions": frame["deletions"],
+        "Repository": frame["repository"],
+        "State": frame["state"].astype("string").str.capitalize(),
+    })
+
+
+def author_frame(frame):
+    authors = frame.groupby("author", observed=True).agg(
+        **{"PR Count": ("number", "size"), "Additions": ("additions", "sum"), "Deletions": ("deletions", "sum")}
+    )
+    authors["Total Changes"] = authors["Additions"] + authors["Deletions"]
+    authors = authors.reset_index().rename(columns={"author": "Author"})
+    authors["Author"] = authors["Author"].astype("string")
+    return authors.sort_values("PR Count", ascending=False, kind="stable")
+
+
+def pr_views(prs):
+    """
+    Builds the PR frame and everything the metrics tab displays from it, once per fetch.
+    """
+    frame = build_pr_frame(prs)
+    return {
+        "frame": frame,
+        "summary": summary_metrics(frame),
+        "timeline": timeline_frame(frame),
+        "sizes": size_frame(frame),
+        "authors": author_frame(frame),
+    }
@@ -0,0 +1,292 @@
+"""
+Local SQLite warehouse of PR metadata and per-PR metrics, synced incrementally.
+
+    python pr_warehouse.py sync --org NexusInnovate --since 2025-01-01
+    python pr_warehouse.py sync --repos NexusInnovate/api NexusInnovate/web
+    python pr_warehouse.py status
+"""
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait
+from github_utils import iter_prs, fetch_org_repos
+from github_rate_limit import get_governor
+from metrics_utils import enrich_prs
+from dotenv import load_dotenv
+load_dotenv()
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+PR_WAREHOUSE_PATH = os.getenv("PR_WAREHOUSE_PATH", os.path.join(CACHE_DIR, "pr_warehouse.sqlite3"))
+# How far back the first sync of a repo goes when no start date is asked for
+PR_WAREHOUSE_BACKFILL_DAYS = int(os.getenv("PR_WAREHOUSE_BACKFILL_DAYS", "90"))
+# The app re-syncs a repo when its last sync is older than this
+PR_WAREHOUSE_MAX_AGE_SECONDS = int(os.getenv("PR_WAREHOUSE_MAX_AGE_SECONDS", "900"))
+SYNC_CONCURRENCY = int(os.getenv("GITHUB_CONCURRENCY", "8"))
+
+
+def _default_since():
+    start = datetime.now(timezone.utc) - timedelta(days=PR_WAREHOUSE_BACKFILL_DAYS)
+    return start.strftime("%Y-%m-%d")
+
+
+class PRWarehouse:
+    """
+    PRs, their comment authors, first review and metrics per repo, plus a sync
+    state row holding the repo's `updated_at` high-water mark, the oldest date
+    covered and when it was last synced.
+
+    A sync lists PRs newest-update first and stops at the high-water mark, so
+    only PRs changed since the previous sync are fetched and enriched again.
+    """
+
+    def __init__(self, path=PR_WAREHOUSE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS prs (
+                repo TEXT,
+                number INTEGER,
+                state TEXT,
+                author TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                merged_at TEXT,
+                data TEXT,
+                PRIMARY KEY (repo, number)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pr_metrics (
+                repo TEXT,
+                number INTEGER,
+                additions INTEGER,
+                deletions INTEGER,
+                comments INTEGER,
+                review_comments INTEGER,
+                commenters TEXT,
+                first_review_at TEXT,
+                error TEXT,
+                PRIMARY KEY (repo, number)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                repo TEXT PRIMARY KEY,
+                high_water TEXT,
+                covered_since TEXT,
+                synced_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS prs_updated ON prs (repo, updated_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS prs_merged ON prs (repo, merged_at)")
+        self._conn.commit()
+
+    def sync_state(self, repo):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water, covered_since, synced_at FROM sync_state WHERE repo = ?", (repo,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"high_water": row[0], "covered_since": row[1], "synced_at": row[2]}
+
+    def needs_sync(self, repo, since=None, max_age=PR_WAREHOUSE_MAX_AGE_SECONDS):
+        state = self.sync_state(repo)
+        if state is None:
+            return True
+        if since and since < state["covered_since"]:
+            return True
+        return time.time() - state["synced_at"] > max_age
+
+    def sync_repo(self, repo, token, since=None):
+        """
+        Fetches PRs updated since the high-water mark (or since `since` when that
+        reaches back past what is already covered), stores them and their metrics.
+        PRs whose metrics failed to load last time are retried.
+
+        Returns the number of PRs fetched.
+        """
+        state = self.sync_state(repo)
+        since = since or (state["covered_since"] if state else _default_since())
+        if state is None or since < state["covered_since"]:
+            lower, covered_since = since, since
+        else:
+            lower, covered_since = state["high_water"] or state["covered_since"], state["covered_since"]
+
+        started = time.time()
+        changed = list(iter_prs(repo, token, lower, "", state="all"))
+        previous = state["high_water"] if state else None
+        high_water = max([pr["updated_at"] for pr in changed] + [previous or ""]) or None
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(repo, pr["number"], pr["state"], pr["user"]["login"], pr["created_at"], pr["updated_at"],
+                  pr.get("merged_at"), json.dumps(pr)) for pr in changed],
+            )
+            retry = [row[0] for row in self._conn.execute(
+                "SELECT number FROM pr_metrics WHERE repo = ? AND error IS NOT NULL", (repo,)
+            )]
+            self._conn.commit()
+
+        numbers = {pr["number"] for pr in changed} | set(retry)
+        enrichment = enrich_prs(repo, [{"number": number} for number in sorted(numbers)])
+        self.store_metrics(repo, enrichment)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                (repo, high_water, covered_since, started),
+            )
+            self._conn.commit()
+        return len(changed)
+
+    def store_metrics(self, repo, enrichment):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pr_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(repo, number, stats["additions"], stats["deletions"], stats["comments"],
+                  stats["review_comments"], json.dumps(stats["commenters"]), stats["first_review_at"],
+                  stats["error"]) for number, stats in enrichment.items()],
+            )
+            self._conn.commit()
+
+    def query_prs(self, repo, since, until, state):
+        """
+        PRs as returned by the GitHub list endpoint, with the same window rules as
+        github_utils.iter_prs: closed means merged within [since, until], newest update first.
+        """
+        if state == "closed":
+            sql = "SELECT data FROM prs WHERE repo = ? AND merged_at >= ? AND merged_at <= ? ORDER BY updated_at DESC"
+            params = (repo, since, until)
+        elif state == "open":
+            sql = "SELECT data FROM prs WHERE repo = ? AND state = 'open' AND updated_at >= ? ORDER BY updated_at DESC"
+            params = (repo, since)
+        else:
+            sql = "SELECT data FROM prs WHERE repo = ? AND updated_at >= ? ORDER BY updated_at DESC"
+            params = (repo, since)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def load_enrichment(self, repo, prs):
+        """
+        Stored metrics of the given PRs in the shape returned by metrics_utils.enrich_prs.
+        """
+        numbers = [pr["number"] for pr in prs]
+        enrichment = {}
+        with self._lock:
+            for start in range(0, len(numbers), 500):
+                batch = numbers[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT number, additions, deletions, comments, review_comments, commenters, "
+                    f"first_review_at, error FROM pr_metrics WHERE repo = ? AND number IN "
+                    f"({', '.join('?' * len(batch))})",
+                    [repo] + batch,
+                ).fetchall()
+                for number, additions, deletions, comments, review_comments, commenters, first_review_at, error in rows:
+                    enrichment[number] = {
+                        "additions": additions,
+                        "deletions": deletions,
+                        "comments": comments,
+                        "review_comments": review_comments,
+                        "commenters": json.loads(commenters),
+                        "first_review_at": first_review_at,
+                        "error": error,
+                    }
+        return enrichment
+
+    def freshness(self, repos=None):
+        """
+        {repo: {"synced_at", "covered_since", "high_water", "prs"}} for synced repos.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.repo, s.synced_at, s.covered_since, s.high_water, COUNT(p.number) "
+                "FROM sync_state s LEFT JOIN prs p ON p.repo = s.repo GROUP BY s.repo"
+            ).fetchall()
+        return {
+            repo: {"synced_at": synced_at, "covered_since": covered_since, "high_water": high_water, "prs": count}
+            for repo, synced_at, covered_since, high_water, count in rows
+            if repos is None or repo in repos
+        }
+
+
+def sync_repos(repos, token, since=None, force=True, concurrency=SYNC_CONCURRENCY, on_wait=None):
+    """
+    Syncs several repos in parallel; returns (synced, errors) mapping repo -> PRs
+    fetched / error message. With force=False, repos synced recently enough are skipped.
+    on_wait(status) is called on the calling thread while a GitHub rate-limit wait is
+    in progress (see RateLimitGovernor.waiting).
+    """
+    warehouse = get_warehouse()
+    governor = get_governor()
+    todo = [repo for repo in repos if force or warehouse.needs_sync(repo, since)]
+    synced, errors = {}, {}
+    if not todo:
+        return synced, errors
+    with ThreadPoolExecutor(max_workers=min(len(todo), concurrency)) as pool:
+        futures = {repo: pool.submit(warehouse.sync_repo, repo, token, since) for repo in todo}
+        while wait(futures.values(), timeout=1)[1]:
+            status = governor.waiting() if governor is not None else None
+            if on_wait and status:
+                on_wait(status)
+    for repo, future in futures.items():
+        if future.exception() is not None:
+            errors[repo] = str(future.exception())
+        else:
+            synced[repo] = future.result()
+    return synced, errors
+
+
+_warehouse = None
+_warehouse_lock = threading.Lock()
+
+
+def get_warehouse():
+    global _warehouse
+    if _warehouse is None:
+        with _warehouse_lock:
+            if _warehouse is None:
+                _warehouse = PRWarehouse()
+    return _warehouse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync and inspect the local PR warehouse")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="Fetch PRs changed since the last sync")
+    sync.add_argument("--org", help="Sync every repository of this organization")
+    sync.add_argument("--repos", nargs="*", default=[], help="owner/name of repositories to sync")
+    sync.add_argument("--since", help="Backfill PRs updated since this date (YYYY-MM-DD)")
+    commands.add_parser("status", help="Show per-repo freshness")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        for repo, info in sorted(get_warehouse().freshness().items()):
+            synced = datetime.fromtimestamp(info["synced_at"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{repo}: {info['prs']} PRs since {info['covered_since']}, synced {synced}")
+        return
+
+    token = os.getenv("GITHUB_TOKEN")
+    repos = list(args.repos)
+    if args.org:
+        repos += fetch_org_repos(args.org, token)
+    if not repos:
+        parser.error("sync needs --org or --repos")
+    synced, errors = sync_repos(repos, token, args.since)
+    for repo, count in sorted(synced.items()):
+        print(f"{repo}: {count} PR(s) updated")
+    for repo, error in sorted(errors.items()):
+        print(f"⚠️ {repo}: {error}")
+
+
+if __name__ == "__main__":
+    main()
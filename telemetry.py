@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from dotenv import load_dotenv
+load_dotenv()
+
+# Structured trace spans, one JSON line per timed stage; written to TRACE_SPANS_PATH or stdout
+TRACE_SPANS = os.getenv("TRACE_SPANS", "false").lower() in ("1", "true", "yes")
+TRACE_SPANS_PATH = os.getenv("TRACE_SPANS_PATH")
+
+STAGE_SECONDS = Histogram(
+    "pr_assistant_stage_seconds", "Time spent in each pipeline stage and client call", ["stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+STAGE_IN_FLIGHT = Gauge("pr_assistant_stage_in_flight", "Stages currently running", ["stage"])
+STAGE_ERRORS = Counter("pr_assistant_stage_errors_total", "Stages that raised, by exception type", ["stage", "error"])
+GITHUB_RESPONSES = Counter("pr_assistant_github_responses_total", "GitHub API responses", ["method", "status"])
+OPENAI_TOKENS = Counter("pr_assistant_openai_tokens_total", "Tokens used by OpenAI responses", ["model", "kind"])
+WEBHOOK_JOBS = Gauge("pr_assistant_webhook_jobs", "Webhook jobs in the queue by status", ["status"])
+
+# The innermost open span of the current thread or asyncio task
+_current_span = contextvars.ContextVar("current_span", default=None)
+_trace_lock = threading.Lock()
+
+
+def _emit(span):
+    line = json.dumps(span, default=str)
+    if TRACE_SPANS_PATH:
+        with _trace_lock, open(TRACE_SPANS_PATH, "a") as f:
+            f.write(line + "\n")
+    else:
+        print(f"trace {line}")
+
+
+@contextmanager
+def stage(name, **attributes):
+    """
+    Times the block as stage `name`: latency histogram, in-flight gauge and error
+    counter, plus a trace span nested under the enclosing stage when TRACE_SPANS is on.
+    Works around `await`s too, since the span is tracked per asyncio task.
+    """
+    parent = _current_span.get()
+    span = {
+        "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        **attributes,
+    }
+    token = _current_span.set(span)
+    STAGE_IN_FLIGHT.labels(name).inc()
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        STAGE_ERRORS.labels(name, type(e).__name__).inc()
+        span["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_SECONDS.labels(name).observe(duration)
+        STAGE_IN_FLIGHT.labels(name).dec()
+        _current_span.reset(token)
+        if TRACE_SPANS:
+            span["start"] = time.time() - duration
+            span["duration_ms"] = round(duration * 1000, 2)
+            _emit(span)
+
+
+def record_github_response(method, response):
+    GITHUB_RESPONSES.labels(method, str(response.status_code)).inc()
+
+
+def record_openai_usage(response):
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    model = getattr(response, "model", None) or "unknown"
+    OPENAI_TOKENS.labels(model, "input").inc(usage.input_tokens)
+    OPENAI_TOKENS.labels(model, "output").inc(usage.output_tokens)
+
+
+def render_metrics():
+    """
+    (body, content type) of the Prometheus text exposition of every metric above.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
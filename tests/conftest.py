@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# Configuration is read at import time; keep every store out of the working tree
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="pr-assistant-tests-"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """
+    Points ai_summarizer at benchmarks/fake_openai.py with an unthrottled scheduler;
+    yields the server (see server.stats).
+    """
+    from openai import OpenAI
+    from fake_openai import start_fake_openai
+    from llm_scheduler import TokenBucketScheduler
+    import ai_summarizer
+    server = start_fake_openai(latency=0.05)
+    scheduler = TokenBucketScheduler(rpm=1_000_000, tpm=1_000_000_000)
+    client = OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+    monkeypatch.setattr(ai_summarizer, "client", client)
+    monkeypatch.setattr(ai_summarizer, "get_scheduler", lambda: scheduler)
+    yield server
+    server.shutdown()
@@ -0,0 +1,101 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import diff_chunker
+import ai_summarizer
+from diff_chunker import chunk_budget, chunk_diff, split_diff_files, split_hunks
+from token_utils import estimate_tokens
+
+
+def _file(path, hunks, lines_per_hunk=20):
+    header = f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+    body = "".join(
+        f"@@ -{h * 100},{lines_per_hunk} +{h * 100},{lines_per_hunk} @@\n"
+        + "".join(f"+line {h}.{i} of {path} with some padding text\n" for i in range(lines_per_hunk))
+        for h in range(hunks)
+    )
+    return header + body
+
+
+def test_small_diff_is_one_chunk():
+    diff = _file("a.py", 1, 3)
+    assert chunk_diff(diff, 10_000) == [diff]
+
+
+def test_split_diff_files_and_hunks():
+    diff = _file("a.py", 2) + _file("b.py", 1)
+    files = split_diff_files(diff)
+    assert len(files) == 2 and "".join(files) == diff
+    header, hunks = split_hunks(files[0])
+    assert header.startswith("diff --git a/a.py") and len(hunks) == 2
+    assert split_diff_files("plain text\n") == ["plain text\n"]
+
+
+def test_chunks_cut_on_file_boundaries_within_budget():
+    files = [_file(f"f{i}.py", 1) for i in range(6)]
+    budget = estimate_tokens(files[0]) * 2 + 10
+    chunks = chunk_diff("".join(files), budget)
+    assert len(chunks) == 3
+    assert "".join(chunks) == "".join(files)
+    assert all(chunk.startswith("diff --git ") for chunk in chunks)
+    assert all(estimate_tokens(chunk) <= budget for chunk in chunks)
+
+
+def test_oversized_file_is_cut_on_hunks_repeating_the_header():
+    diff = _file("big.py", 6)
+    header, hunks = split_hunks(diff)
+    # Each hunk is costed with its header, so two hunks fit in twice that
+    budget = estimate_tokens(header + hunks[0]) * 2 + 10
+    chunks = chunk_diff(diff, budget)
+    assert len(chunks) == 3
+    assert all(chunk.startswith(header) for chunk in chunks)
+    assert "".join(chunk[len(header):] for chunk in chunks) == "".join(hunks)
+
+
+def test_oversized_hunk_is_cut_on_lines():
+    diff = _file("huge.py", 1, lines_per_hunk=200)
+    header, _ = split_hunks(diff)
+    budget = estimate_tokens(header) + 200
+    chunks = chunk_diff(diff, budget)
+    assert len(chunks) > 1
+    assert all(chunk.startswith(header) for chunk in chunks)
+    assert all(estimate_tokens(chunk) <= budget + 20 for chunk in chunks)
+    assert sum(chunk.count("\n+line") for chunk in chunks) == 200
+
+
+def test_chunk_budget_per_model():
+    assert chunk_budget("gpt-4o") == diff_chunker.MODEL_CHUNK_TOKENS["gpt-4o"]
+    assert chunk_budget("unknown-model") == diff_chunker.DEFAULT_CHUNK_TOKENS
+
+
+def test_map_reduce_summarizes_chunks_and_combines(fake_openai, monkeypatch):
+    monkeypatch.setitem(diff_chunker.MODEL_CHUNK_TOKENS, ai_summarizer.MODEL, 300)
+    diff = "".join(_file(f"f{i}.py", 1) for i in range(4))
+    summary = ai_summarizer.summarize_diff(diff, use_cache=False)
+    assert summary.startswith("Fake summary")
+    # One call per chunk, then at least one combining call
+    assert fake_openai.stats["requests"] > len(chunk_diff(diff, 300))
+
+
+def test_chunk_calls_share_one_process_wide_limit(fake_openai, monkeypatch):
+    monkeypatch.setitem(diff_chunker.MODEL_CHUNK_TOKENS, ai_summarizer.MODEL, 300)
+    monkeypatch.setattr(ai_summarizer, "_map_slots", threading.BoundedSemaphore(2))
+    active, peak, lock = [0], [0], threading.Lock()
+    create = ai_summarizer.client.responses.create
+
+    def counting_create(**kwargs):
+        is_part = kwargs["input"].startswith("Summarize part")
+        with lock:
+            active[0] += is_part
+            peak[0] = max(peak[0], active[0])
+        try:
+            return create(**kwargs)
+        finally:
+            with lock:
+                active[0] -= is_part
+    monkeypatch.setattr(ai_summarizer.client.responses, "create", counting_create)
+
+    diffs = ["".join(_file(f"f{i}-{n}.py", 1) for i in range(6)) for n in range(3)]
+    with ThreadPoolExecutor(3) as pool:
+        summaries = list(pool.map(lambda diff: ai_summarizer.summarize_diff(diff, use_cache=False), diffs))
+    assert all(summaries)
+    assert peak[0] == 2
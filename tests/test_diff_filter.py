@@ -0,0 +1,56 @@
+from diff_filter import parse_file_diff, match_rule, filter_diff, filter_totals
+
+
+def _file(path, added, header=None):
+    lines = header or [f"diff --git a/{path} b/{path}", "index 1111111..2222222 100644",
+                       f"--- a/{path}", f"+++ b/{path}", "@@ -0,0 +1,{} @@".format(len(added))]
+    return "\n".join(lines + [f"+{line}" for line in added]) + "\n"
+
+
+def test_parse_file_diff_reads_path_and_added_lines():
+    parsed = parse_file_diff(_file("src/app.py", ["print(1)", "print(2)"]) + "-removed\n context\n")
+    assert parsed == {"path": "src/app.py", "binary": False, "added": ["print(1)", "print(2)"]}
+
+
+def test_parse_file_diff_handles_new_deleted_and_binary_files():
+    deleted = "diff --git a/old.py b/old.py\ndeleted file mode 100644\n--- a/old.py\n+++ /dev/null\n-x\n"
+    assert parse_file_diff(deleted)["path"] == "old.py"
+    binary = "diff --git a/logo.png b/logo.png\nBinary files /dev/null and b/logo.png differ\n"
+    assert parse_file_diff(binary) == {"path": "logo.png", "binary": True, "added": []}
+
+
+def test_match_rule_by_glob_binary_and_content():
+    assert match_rule(parse_file_diff(_file("web/package-lock.json", ["{}"]))) == "lockfile"
+    assert match_rule(parse_file_diff(_file("static/app.min.js", ["x"]))) == "minified"
+    assert match_rule(parse_file_diff(_file("vendor/lib/a.go", ["x"]))) == "vendored"
+    assert match_rule({"path": "a.png", "binary": True, "added": []}) == "binary"
+    generated = ["// Code generated by protoc. DO NOT EDIT."] + ["x = 1"] * 30
+    assert match_rule(parse_file_diff(_file("api/api.pb.go", generated))) == "generated"
+    assert match_rule(parse_file_diff(_file("bundle.js", ["a" * 500] * 30))) == "long_lines"
+    assert match_rule(parse_file_diff(_file("src/app.py", ["print(1)"] * 30))) is None
+
+
+def test_short_files_are_not_checked_for_generated_markers():
+    assert match_rule(parse_file_diff(_file("src/a.py", ["# auto-generated"]))) is None
+
+
+def test_custom_globs_replace_the_defaults():
+    parsed = parse_file_diff(_file("docs/api/index.md", ["x"]))
+    assert match_rule(parsed, {"custom": ["docs/api/*"]}) == "custom"
+    assert match_rule(parse_file_diff(_file("yarn.lock", ["x"])), {"custom": ["docs/api/*"]}) is None
+
+
+def test_filter_diff_replaces_dropped_files_with_a_note():
+    code = _file("src/app.py", ["print(1)"])
+    lock = _file("yarn.lock", ["dep@1.0.0"] * 50)
+    before = filter_totals().get("lockfile", {"files": 0})["files"]
+    filtered, report = filter_diff(code + lock)
+    assert filtered == code + "diff --git a/yarn.lock b/yarn.lock\n# changes omitted (lockfile)\n"
+    assert report["lockfile"]["files"] == 1
+    assert report["lockfile"]["bytes"] > 0 and report["lockfile"]["tokens"] > 0
+    assert filter_totals()["lockfile"]["files"] == before + 1
+
+
+def test_filter_diff_keeps_non_git_text_untouched():
+    text = "not a diff at all\n"
+    assert filter_diff(text) == (text, {})
@@ -0,0 +1,95 @@
+import time
+import httpx
+from github_rate_limit import RateLimitGovernor
+
+URL = "https://api.github.com/repos/o/r/pulls"
+
+
+def _response(status=200, remaining=None, limit=5000, reset=None, text="", **headers):
+    if remaining is not None:
+        headers["x-ratelimit-remaining"] = str(remaining)
+        headers["x-ratelimit-limit"] = str(limit)
+        headers["x-ratelimit-reset"] = str(reset or time.time() + 3600)
+    return httpx.Response(status, headers=headers, text=text)
+
+
+def _budget(governor):
+    return governor.stats()["budgets"][0]
+
+
+def test_concurrency_shrinks_as_the_budget_runs_low():
+    governor = RateLimitGovernor(max_in_flight=10, throttle_below=0.2, reserve=5)
+    governor.acquire("t", URL)
+    governor.release("t", URL, _response(remaining=4000))
+    assert _budget(governor)["allowed_in_flight"] == 10
+    governor.acquire("t", URL)
+    # 500 left is half of the 20% threshold
+    governor.release("t", URL, _response(remaining=500))
+    assert _budget(governor)["allowed_in_flight"] == 5
+
+
+def test_waits_for_the_reset_once_only_the_reserve_is_left():
+    governor = RateLimitGovernor(reserve=5)
+    governor.acquire("t", URL)
+    governor.release("t", URL, _response(remaining=5, reset=time.time() + 120))
+    key = next(iter(governor._state))
+    assert governor._try_acquire(key) > 100
+    assert governor.waiting()["reason"] == "core rate limit exhausted"
+    assert governor.waits == 1
+
+
+def test_budgets_are_per_token_and_resource():
+    governor = RateLimitGovernor(reserve=5)
+    governor.acquire("a", URL)
+    governor.release("a", URL, _response(remaining=0, reset=time.time() + 120))
+    assert governor._try_acquire(next(iter(governor._state))) > 0
+    # Another token, and the GraphQL budget of the same token, are admitted right away
+    governor.acquire("b", URL)
+    governor.acquire("a", "https://api.github.com/graphql")
+    budgets = governor.stats()["budgets"]
+    in_flight = {budget["resource"]: budget["in_flight"] for budget in budgets if budget["in_flight"]}
+    assert in_flight == {"core": 1, "graphql": 1}
+
+
+def test_plain_permission_error_is_not_retried():
+    governor = RateLimitGovernor()
+    assert governor.retry_delay("t", URL, _response(403, text="Resource not accessible"), 0) is None
+    assert governor.retry_delay("t", URL, _response(404), 0) is None
+
+
+def test_retry_after_pauses_every_caller_of_the_token():
+    governor = RateLimitGovernor()
+    delay = governor.retry_delay("t", URL, _response(429, **{"retry-after": "30"}), 0)
+    assert 30 <= delay <= 34
+    assert governor.waiting()["reason"] == "secondary rate limit"
+    assert governor._try_acquire(next(iter(governor._state))) > 25
+
+
+def test_exhausted_budget_waits_until_the_reset():
+    governor = RateLimitGovernor()
+    reset = time.time() + 60
+    delay = governor.retry_delay("t", URL, _response(403, remaining=0, reset=reset, text="API rate limit exceeded"), 0)
+    assert 59 <= delay <= 70
+    assert governor.secondary_limits == 0
+
+
+def test_secondary_limit_halves_the_ceiling_which_grows_back_on_success():
+    governor = RateLimitGovernor(max_in_flight=8)
+    governor.retry_delay("t", URL, _response(403, text="You have exceeded a secondary rate limit"), 0)
+    assert governor.secondary_limits == 1
+    state = next(iter(governor._state.values()))
+    assert state["ceiling"] == 4
+    state["paused_until"] = 0
+    for _ in range(20):
+        governor.acquire("t", URL)
+        governor.release("t", URL, _response())
+    assert state["ceiling"] == 5
+
+
+def test_release_without_response_frees_the_slot():
+    governor = RateLimitGovernor(max_in_flight=1)
+    governor.acquire("t", URL)
+    key = next(iter(governor._state))
+    assert governor._try_acquire(key) == 0.05
+    governor.release("t", URL, None)
+    assert governor._try_acquire(key) == 0
@@ -0,0 +1,85 @@
+import pytest
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=2)
+
+
+def test_claims_in_fifo_order_once(queue):
+    first, _ = queue.enqueue("review", {"n": 1})
+    second, _ = queue.enqueue("review", {"n": 2})
+    assert queue.claim()["id"] == first
+    assert queue.claim()["id"] == second
+    assert queue.claim() is None
+
+
+def test_delayed_job_is_not_claimed_early(queue):
+    queue.enqueue("review", {}, delay=60)
+    assert queue.claim() is None
+    assert queue.depth()["pending"] == 1
+
+
+def test_newer_job_supersedes_pending_ones_with_same_key(queue):
+    old, _ = queue.enqueue("review", {"sha": "a"}, coalesce_key="o/r#1")
+    queue.enqueue("review", {"sha": "x"}, coalesce_key="o/r#2")
+    new, superseded = queue.enqueue("review", {"sha": "b"}, coalesce_key="o/r#1")
+    assert superseded == 1
+    assert queue.is_stale(old, "o/r#1")
+    assert not queue.is_stale(new, "o/r#1")
+    claimed = [queue.claim()["payload"]["sha"] for _ in range(2)]
+    assert claimed == ["x", "b"]
+    assert queue.depth()["superseded"] == 1
+
+
+def test_running_job_goes_stale_and_can_be_cancelled(queue):
+    queue.enqueue("review", {}, coalesce_key="o/r#1")
+    job = queue.claim()
+    queue.enqueue("review", {}, coalesce_key="o/r#1")
+    assert queue.is_stale(job["id"], job["coalesce_key"])
+    queue.cancel(job["id"])
+    assert queue.depth()["cancelled"] == 1
+
+
+def test_failures_retry_with_backoff_until_max_attempts(queue):
+    queue.enqueue("review", {})
+    job = queue.claim()
+    queue.fail(job["id"], "boom")
+    depth = queue.depth()
+    assert depth["pending"] == 1 and depth["failed"] == 0
+    # Backed off: not runnable again right away
+    assert queue.claim() is None
+    queue._conn.execute("UPDATE jobs SET run_after = 0")
+    job = queue.claim()
+    assert job["attempts"] == 2
+    queue.fail(job["id"], "boom")
+    assert queue.depth()["failed"] == 1
+
+
+def test_recover_requeues_running_jobs_from_a_previous_process(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(path)
+    queue.enqueue("review", {"n": 1})
+    job = queue.claim()
+    restarted = JobQueue(path)
+    assert restarted.recover() == 1
+    again = restarted.claim()
+    assert again["id"] == job["id"]
+    assert again["attempts"] == 2
+
+
+def test_recover_purges_old_finished_jobs(queue, monkeypatch):
+    job_id, _ = queue.enqueue("review", {})
+    queue.claim()
+    queue.complete(job_id)
+    monkeypatch.setattr("job_queue.JOB_RETENTION_SECONDS", -1)
+    queue.recover()
+    assert queue.depth()["done"] == 0
+
+
+def test_records_last_reviewed_head(queue):
+    assert queue.last_reviewed_sha("o/r#1") is None
+    queue.record_review("o/r#1", "abc")
+    queue.record_review("o/r#1", "def")
+    assert queue.last_reviewed_sha("o/r#1") == "def"
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from llm_scheduler import TokenBucketScheduler
+
+
+def test_admits_requests_within_both_budgets():
+    scheduler = TokenBucketScheduler(rpm=60, tpm=1000)
+    assert scheduler._try_acquire(400) == 0
+    assert scheduler._try_acquire(400) == 0
+    stats = scheduler.stats()
+    assert stats["requests_available"] == 58
+    assert 199 <= stats["tokens_available"] <= 201
+
+
+def test_waits_for_token_refill():
+    scheduler = TokenBucketScheduler(rpm=60, tpm=600)
+    assert scheduler._try_acquire(600) == 0
+    # 300 tokens refill in 30s at 600 per minute
+    assert 29 < scheduler._try_acquire(300) <= 30
+
+
+def test_waits_for_request_refill():
+    scheduler = TokenBucketScheduler(rpm=2, tpm=1_000_000)
+    assert scheduler._try_acquire(1) == 0
+    assert scheduler._try_acquire(1) == 0
+    assert 29 < scheduler._try_acquire(1) <= 30
+
+
+def test_oversized_request_waits_for_a_full_bucket_instead_of_forever():
+    scheduler = TokenBucketScheduler(rpm=60, tpm=100)
+    assert scheduler._try_acquire(10_000) == 0
+
+
+def test_settle_returns_overestimated_tokens():
+    scheduler = TokenBucketScheduler(rpm=60, tpm=1000)
+    scheduler._try_acquire(800)
+    scheduler.settle(800, 200)
+    assert scheduler.stats()["tokens_available"] >= 799
+
+
+def test_pause_stops_every_caller():
+    scheduler = TokenBucketScheduler(rpm=60, tpm=1000)
+    scheduler.pause(5)
+    assert 4 < scheduler._try_acquire(1) <= 5
+    assert scheduler.stats()["pauses"] == 1
+
+
+def test_acquire_blocks_until_refilled():
+    scheduler = TokenBucketScheduler(rpm=6000, tpm=6000)
+    scheduler._try_acquire(6000)
+    started = time.monotonic()
+    scheduler.acquire(50)  # 50 tokens refill in 0.5s
+    assert 0.4 < time.monotonic() - started < 1.5
+    stats = scheduler.stats()
+    assert stats["waits"] == 1
+    assert 0.4 < stats["seconds_waited"] < 1.5
+
+
+def test_acquire_async_blocks_until_refilled():
+    scheduler = TokenBucketScheduler(rpm=6000, tpm=6000)
+    scheduler._try_acquire(6000)
+    started = time.monotonic()
+    asyncio.run(scheduler.acquire_async(50))
+    assert 0.4 < time.monotonic() - started < 1.5
@@ -0,0 +1,35 @@
+import metrics_utils
+
+
+def _page(nodes, cursor=None):
+    return {"pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor}, "nodes": nodes}
+
+
+def test_comments_and_reviews_past_the_first_page_are_paged(monkeypatch):
+    review = {"submittedAt": "2024-01-02T00:00:00Z", "comments": {"totalCount": 1}}
+    early_review = {"submittedAt": "2024-01-01T00:00:00Z", "comments": {"totalCount": 2}}
+    pages = {
+        ("comments", "c1"): _page([{"author": {"login": "bob"}}]),
+        ("reviews", "r1"): _page([review] * 100, "r2"),
+        ("reviews", "r2"): _page([early_review]),
+    }
+    queries = []
+
+    def graphql(query, variables=None):
+        if "cursor" not in (variables or {}):
+            pr = {
+                "additions": 3, "deletions": 1,
+                "comments": _page([{"author": None}], "c1"),
+                "reviews": _page([review] * 100, "r1"),
+            }
+            return {"repository": {"pr7": pr}}
+        connection = "comments" if "comments(first: 100, after" in query else "reviews"
+        queries.append((connection, variables["cursor"]))
+        return {"repository": {"pullRequest": {connection: pages[(connection, variables["cursor"])]}}}
+
+    monkeypatch.setattr(metrics_utils, "graphql", graphql)
+    stats = metrics_utils.fetch_pr_metrics_graphql("o/r", [7])[7]
+    assert queries == [("comments", "c1"), ("reviews", "r1"), ("reviews", "r2")]
+    assert stats["commenters"] == ["ghost", "bob"]
+    assert stats["review_comments"] == 200 + 2
+    assert stats["first_review_at"] == "2024-01-01T00:00:00Z"
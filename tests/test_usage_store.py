@@ -0,0 +1,109 @@
+import pytest
+import ai_summarizer
+from usage_store import UsageStore, BudgetExceeded, DEGRADED_MODEL, estimate_cost
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "usage.sqlite3")
+
+
+def test_estimate_cost_prices_dated_snapshots_like_their_model():
+    assert estimate_cost("gpt-4o", 1_000_000, 1_000_000) == pytest.approx(12.50)
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0) == pytest.approx(0.15)
+    assert estimate_cost("unknown", 1_000_000, 1_000_000) == 0
+
+
+def test_budget_mode_thresholds(path):
+    store = UsageStore(path, budgets={"o/r": 1.0})
+    assert store.budget_mode("o/r") == "full"
+    store.record("gpt-4o", 300_000, 0, 0.1, repo="o/r")  # $0.75
+    assert store.budget_mode("o/r") == "full"
+    store.record("gpt-4o", 40_000, 0, 0.1, repo="o/r")  # $0.85
+    assert store.budget_mode("o/r") == "degraded"
+    store.record("gpt-4o", 100_000, 0, 0.1, repo="o/r")  # $1.10
+    assert store.budget_mode("o/r") == "skip"
+
+
+def test_no_budget_or_no_repo_is_never_limited(path):
+    store = UsageStore(path, default_budget=0)
+    store.record("gpt-4o", 10_000_000, 0, 0.1, repo="o/r")
+    assert store.budget_mode("o/r") == "full"
+    assert store.budget_mode(None) == "full"
+
+
+def test_spend_is_shared_between_processes(path):
+    # Two stores on one file, like the app, the webhook server and the CLI
+    app, webhook = UsageStore(path, budgets={"o/r": 1.0}), UsageStore(path, budgets={"o/r": 1.0})
+    assert app.budget_mode("o/r") == "full"
+    webhook.record("gpt-4o", 1_000_000, 0, 0.1, repo="o/r")
+    assert app.spent_today("o/r") == pytest.approx(2.50)
+    assert app.budget_mode("o/r") == "skip"
+
+
+def test_totals_and_budgets_today(path):
+    store = UsageStore(path, budgets={"o/idle": 5.0})
+    store.record("gpt-4o", 1000, 100, 0.2, repo="o/r", pr_number=1, caller="cli", operation="summary")
+    store.record("gpt-4o", 1000, 100, 0.4, repo="o/r", pr_number=2, caller="cli", operation="summary")
+    store.record("gpt-4o-mini", 500, 50, 0.1, repo="o/r", caller="webhook", operation="review")
+    totals = store.totals(days=1, group_by=("caller",))
+    assert totals[0] == {"caller": "cli", "calls": 2, "input_tokens": 2000, "output_tokens": 200,
+                         "cost_usd": 0.007, "avg_latency_ms": 300.0}
+    assert totals[1]["caller"] == "webhook"
+    budgets = {row["repo"]: row for row in store.budgets_today()}
+    assert budgets["o/idle"] == {"repo": "o/idle", "budget_usd": 5.0, "spent_usd": 0, "mode": "full"}
+    assert budgets["o/r"]["budget_usd"] is None
+
+
+def test_calls_are_recorded_per_repo_pr_and_caller(fake_openai, monkeypatch, path):
+    store = UsageStore(path)
+    monkeypatch.setattr(ai_summarizer, "get_usage_store", lambda: store)
+    ai_summarizer.summarize_diff("+print(1)\n", use_cache=False, repo="o/r", pr_number=7, caller="cli")
+    ai_summarizer.review_pr("+print(1)\n", use_cache=False, repo="o/r", pr_number=7, caller="webhook")
+    rows = store.totals(days=1, group_by=("repo", "caller", "model"))
+    assert [(row["repo"], row["caller"], row["model"], row["calls"]) for row in rows] == [
+        ("o/r", "cli", "gpt-4o", 1), ("o/r", "webhook", "gpt-4o", 1),
+    ]
+    assert all(row["input_tokens"] > 0 and row["cost_usd"] > 0 for row in rows)
+
+
+def test_degraded_repo_uses_the_cheaper_model(fake_openai, monkeypatch, path):
+    store = UsageStore(path, budgets={"o/r": 1.0})
+    store.record("gpt-4o", 360_000, 0, 0.1, repo="o/r")  # $0.90
+    monkeypatch.setattr(ai_summarizer, "get_usage_store", lambda: store)
+    ai_summarizer.summarize_diff("+print(1)\n", use_cache=False, repo="o/r", pr_number=1, caller="cli")
+    models = {row["model"]: row["calls"] for row in store.totals(days=1, group_by=("model",))}
+    assert models == {"gpt-4o": 1, DEGRADED_MODEL: 1}
+
+
+def test_budget_is_read_once_per_chunked_call(fake_openai, monkeypatch, path):
+    import diff_chunker
+    monkeypatch.setitem(diff_chunker.MODEL_CHUNK_TOKENS, ai_summarizer.MODEL, 300)
+    store = UsageStore(path, budgets={"o/r": 100.0})
+    reads = []
+    budget_mode = store.budget_mode
+    monkeypatch.setattr(store, "budget_mode", lambda repo: reads.append(repo) or budget_mode(repo))
+    monkeypatch.setattr(ai_summarizer, "get_usage_store", lambda: store)
+    diff = "".join(f"diff --git a/f{i}.py b/f{i}.py\n@@ -0,0 +1 @@\n" + "+x = 1\n" * 80 for i in range(4))
+    ai_summarizer.summarize_diff(diff, use_cache=False, repo="o/r", pr_number=1, caller="cli")
+    assert fake_openai.stats["requests"] > 1
+    assert reads == ["o/r"]
+
+
+def test_over_budget_repo_is_skipped_without_a_request(fake_openai, monkeypatch, path):
+    store = UsageStore(path, budgets={"o/r": 1.0})
+    store.record("gpt-4o", 1_000_000, 0, 0.1, repo="o/r")
+    monkeypatch.setattr(ai_summarizer, "get_usage_store", lambda: store)
+    with pytest.raises(BudgetExceeded):
+        ai_summarizer.review_pr("+print(1)\n", use_cache=False, repo="o/r", pr_number=1, caller="webhook")
+    assert fake_openai.stats["requests"] == 0
+
+
+def test_release_notes_of_other_repos_survive_an_over_budget_repo(fake_openai, monkeypatch, path):
+    from pipeline import summarize_repos
+    store = UsageStore(path, budgets={"o/a": 0.01})
+    store.record("gpt-4o", 100_000, 0, 0.1, repo="o/a")
+    monkeypatch.setattr(ai_summarizer, "get_usage_store", lambda: store)
+    notes = summarize_repos({"o/a": ["one", "two"], "o/b": ["one", "two"]}, use_cache=False)
+    assert notes["o/a"] is None
+    assert notes["o/b"].startswith("Fake summary")
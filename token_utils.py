@@ -0,0 +1,20 @@
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to the ~4 characters per token rule of thumb
+    tiktoken = None
+
+_encoding = None
+
+
+def estimate_tokens(text):
+    """
+    Estimates how many tokens `text` costs for the gpt-4o family.
+    """
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
@@ -0,0 +1,176 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime, timezone, timedelta
+from dotenv import load_dotenv
+load_dotenv()
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+USAGE_STORE_PATH = os.getenv("USAGE_STORE_PATH", os.path.join(CACHE_DIR, "llm_usage.sqlite3"))
+USAGE_TRACKING_ENABLED = os.getenv("USAGE_TRACKING_ENABLED", "true").lower() in ("1", "true", "yes")
+# Daily OpenAI budget per repo in USD (0 = unlimited); override per repo with
+# REPO_DAILY_BUDGETS="NexusInnovate/api=5,NexusInnovate/web=2"
+REPO_DAILY_BUDGET_USD = float(os.getenv("REPO_DAILY_BUDGET_USD", "0"))
+REPO_DAILY_BUDGETS = {}
+for _item in filter(None, os.getenv("REPO_DAILY_BUDGETS", "").split(",")):
+    _repo, _, _budget = _item.partition("=")
+    REPO_DAILY_BUDGETS[_repo.strip()] = float(_budget)
+# Past this fraction of its budget a repo is served by DEGRADED_MODEL; past the budget its work is skipped
+BUDGET_DEGRADE_AT = float(os.getenv("BUDGET_DEGRADE_AT", "0.8"))
+DEGRADED_MODEL = os.getenv("DEGRADED_MODEL", "gpt-4o-mini")
+
+# USD per million input / output tokens; override with OPENAI_PRICES="gpt-4o=2.5/10,gpt-4o-mini=0.15/0.6"
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+for _item in filter(None, os.getenv("OPENAI_PRICES", "").split(",")):
+    _model, _, _prices = _item.partition("=")
+    _input, _, _output = _prices.partition("/")
+    MODEL_PRICES[_model.strip()] = (float(_input), float(_output))
+
+
+class BudgetExceeded(RuntimeError):
+    """
+    Raised instead of calling the model once a repo has spent its daily budget.
+    """
+
+
+def estimate_cost(model, input_tokens, output_tokens):
+    # Dated snapshots (gpt-4o-2024-08-06) are priced like their base model
+    prices = MODEL_PRICES.get(model) or next(
+        (price for name, price in sorted(MODEL_PRICES.items(), key=lambda item: -len(item[0]))
+         if model.startswith(name)),
+        (0.0, 0.0),
+    )
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def _today():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class UsageStore:
+    """
+    SQLite log of every model call: tokens, latency and estimated cost per repo,
+    PR, caller (e.g. "tab:merged", "webhook", "cli") and operation, by UTC day.
+
+    The app, the webhook server and the CLI run as separate processes sharing the
+    file, so budget checks always read the day's spend from it (an indexed sum).
+    """
+
+    def __init__(self, path=USAGE_STORE_PATH, default_budget=REPO_DAILY_BUDGET_USD, budgets=None):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.default_budget = default_budget
+        self.budgets = dict(REPO_DAILY_BUDGETS if budgets is None else budgets)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage (
+                ts REAL,
+                day TEXT,
+                repo TEXT,
+                pr_number INTEGER,
+                caller TEXT,
+                operation TEXT,
+                model TEXT,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                latency_ms REAL,
+                cost_usd REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS usage_day_repo ON usage (day, repo)")
+        self._conn.commit()
+
+    def record(self, model, input_tokens, output_tokens, latency, repo=None, pr_number=None, caller=None,
+               operation=None):
+        cost = estimate_cost(model, input_tokens, output_tokens)
+        day = _today()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO usage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), day, repo, pr_number, caller or "unknown", operation, model, input_tokens,
+                 output_tokens, round(latency * 1000, 1), cost),
+            )
+            self._conn.commit()
+        return cost
+
+    def spent_today(self, repo):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(cost_usd), 0) FROM usage WHERE day = ? AND repo IS ?", (_today(), repo)
+            ).fetchone()
+        return row[0]
+
+    def budget(self, repo):
+        return self.budgets.get(repo, self.default_budget)
+
+    def budget_mode(self, repo):
+        """
+        "full", "degraded" (past BUDGET_DEGRADE_AT of the budget) or "skip" for today.
+        """
+        budget = self.budget(repo)
+        if not repo or budget <= 0:
+            return "full"
+        spent = self.spent_today(repo)
+        if spent >= budget:
+            return "skip"
+        if spent >= budget * BUDGET_DEGRADE_AT:
+            return "degraded"
+        return "full"
+
+    def totals(self, days=7, group_by=("day", "repo", "caller", "model")):
+        """
+        Calls, tokens, cost and mean latency of the last `days` days, grouped by the given columns.
+        """
+        columns = ", ".join(group_by)
+        since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns}, COUNT(*), SUM(input_tokens), SUM(output_tokens), SUM(cost_usd), "
+                f"AVG(latency_ms) FROM usage WHERE day >= ? GROUP BY {columns} ORDER BY {columns}",
+                (since,),
+            ).fetchall()
+        return [
+            {**dict(zip(group_by, row[:len(group_by)])), "calls": row[-5], "input_tokens": row[-4],
+             "output_tokens": row[-3], "cost_usd": round(row[-2], 4), "avg_latency_ms": round(row[-1], 1)}
+            for row in rows
+        ]
+
+    def budgets_today(self):
+        """
+        Budget, spend and mode of every repo with a budget or spend today.
+        """
+        with self._lock:
+            repos = [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT repo FROM usage WHERE day = ? AND repo IS NOT NULL", (_today(),)
+            )]
+        repos = sorted(set(repos) | set(self.budgets))
+        return [{
+            "repo": repo,
+            "budget_usd": self.budget(repo) or None,
+            "spent_usd": round(self.spent_today(repo), 4),
+            "mode": self.budget_mode(repo),
+        } for repo in repos]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_usage_store():
+    """
+    Returns the shared UsageStore, or None when USAGE_TRACKING_ENABLED is off.
+    """
+    global _store
+    if not USAGE_TRACKING_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = UsageStore()
+    return _store
@@ -1,20 +1,184 @@
 from fastapi import FastAPI, Request, Header, HTTPException
+from fastapi.responses import JSONResponse, Response
 import hmac
 import hashlib
 import os
 import json
-import httpx
+import asyncio
 
-from github_utils import get_diff
-from ai_summarizer import review_pr
+from github_client import get_async_client, close_async_client
+from github_utils import aget_diff, aget_compare, aget_compare_diff, COMPARE_MAX_FILES
+from ai_summarizer import areview_pr, BudgetExceeded
+from job_queue import JobQueue
+from telemetry import stage, render_metrics, WEBHOOK_JOBS
 
 from dotenv import load_dotenv
 load_dotenv()
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+# How often idle workers look for delayed (debounced or retried) jobs
+WEBHOOK_POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "5"))
+# A PR must be quiet this long before it is reviewed; newer pushes replace pending reviews
+WEBHOOK_QUIET_SECONDS = float(os.getenv("WEBHOOK_QUIET_SECONDS", "30"))
+# Re-review only the commits pushed since the last reviewed head
+INCREMENTAL_REVIEW = os.getenv("INCREMENTAL_REVIEW", "true").lower() in ("1", "true", "yes")
 
 app = FastAPI()
+job_queue = JobQueue()
+_job_available = asyncio.Event()
+_workers = []
+# coalesce_key -> (job_id, task) of the review currently running for that PR
+_in_flight = {}
+# Running job ids cancelled because a newer event arrived for their PR
+_outdated_jobs = set()
+
+
+async def get_incremental_diff(payload, last_sha):
+    """
+    Returns the diff between the last reviewed head and the new head, or None when a
+    full review is needed: the old head is gone or no longer an ancestor (force-push),
+    the compare file list is truncated, or the delta is not smaller than the whole PR.
+    """
+    compare = await aget_compare(payload["repo"], last_sha, payload["head_sha"], GITHUB_TOKEN)
+    if compare is None or compare.get("status") != "ahead":
+        return None
+    # A capped file list would undercount the delta
+    if len(compare.get("files", [])) >= COMPARE_MAX_FILES:
+        return None
+    delta_lines = sum(f.get("additions", 0) + f.get("deletions", 0) for f in compare.get("files", []))
+    pr_lines = payload.get("additions", 0) + payload.get("deletions", 0)
+    if pr_lines and delta_lines >= pr_lines:
+        return None
+    return await aget_compare_diff(payload["repo"], last_sha, payload["head_sha"], GITHUB_TOKEN)
+
+
+async def run_review_job(job):
+    """
+    Fetches the diff, runs the AI review and posts it back on the PR.
+
+    Returns "posted", "unchanged" when the head was already reviewed, "outdated"
+    when a newer event for the PR arrived in the meantime, or "over_budget" when the
+    repo has spent its daily OpenAI budget.
+    """
+    payload = job["payload"]
+    repo = payload["repo"]
+    pr_number = payload["pr_number"]
+    head_sha = payload["head_sha"]
+
+    last_sha = job_queue.last_reviewed_sha(job["coalesce_key"]) if INCREMENTAL_REVIEW else None
+    if last_sha == head_sha:
+        return "unchanged"
+
+    # Get PR diff, only the new commits when possible
+    with stage("webhook_diff", repo=repo, pr_number=pr_number):
+        diff_text = await get_incremental_diff(payload, last_sha) if last_sha else None
+        incremental = diff_text is not None
+        if not incremental:
+            diff_text = await aget_diff(repo, pr_number, GITHUB_TOKEN, payload["base_sha"], head_sha)
+
+    # Run AI code review
+    with stage("webhook_review", repo=repo, pr_number=pr_number, incremental=incremental):
+        try:
+            suggestions = await areview_pr(diff_text, repo=repo, pr_number=pr_number, caller="webhook")
+        except BudgetExceeded as e:
+            # Retrying would not help before tomorrow; the next push is reviewed once the budget resets
+            print(f"⚠️ Skipped review of {repo}#{pr_number}: {e}")
+            return "over_budget"
+
+    # Post comment back to PR
+    scope = f"🔁 Incremental review of changes since `{last_sha[:7]}`\n\n" if incremental else ""
+    comment_body = {
+        "body": f"🤖 **AI Code Review Suggestions for #{pr_number} - {payload['title']}**\n\n"
+                f"👤 Author: `{payload['author']}`\n\n"
+                f"{scope}"
+                f"---\n\n"
+                f"{suggestions}"
+    }
+
+    # A newer push arrived while reviewing: this review is already outdated
+    if job_queue.is_stale(job["id"], job["coalesce_key"]):
+        return "outdated"
+
+    with stage("webhook_post_comment", repo=repo, pr_number=pr_number):
+        response = await get_async_client().post(
+            payload["comments_url"], token=GITHUB_TOKEN, accept="application/vnd.github.v3+json", json=comment_body
+        )
+        response.raise_for_status()
+    job_queue.record_review(job["coalesce_key"], head_sha)
+    return "posted"
+
+
+async def traced_review_job(job):
+    # Root span of the job; the diff, review and comment stages and every client call nest under it
+    with stage("webhook_job", job_id=job["id"], attempt=job["attempts"]):
+        return await run_review_job(job)
+
+
+async def worker(worker_id):
+    while True:
+        # Cleared before claiming, so an enqueue between the claim and the wait still wakes us
+        _job_available.clear()
+        job = job_queue.claim()
+        if job is None:
+            try:
+                await asyncio.wait_for(_job_available.wait(), timeout=WEBHOOK_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        if job_queue.is_stale(job["id"], job["coalesce_key"]):
+            job_queue.cancel(job["id"])
+            continue
+        task = asyncio.create_task(traced_review_job(job))
+        _in_flight[job["coalesce_key"]] = (job["id"], task)
+        try:
+            outcome = await task
+        except asyncio.CancelledError:
+            if job["id"] not in _outdated_jobs:
+                # The worker itself is shutting down; the job is requeued on next startup
+                raise
+            job_queue.cancel(job["id"])
+        except Exception as e:
+            if job_queue.is_stale(job["id"], job["coalesce_key"]):
+                job_queue.cancel(job["id"])
+            else:
+                print(f"⚠️ Worker {worker_id} failed job {job['id']} (attempt {job['attempts']}): {e}")
+                job_queue.fail(job["id"], str(e))
+        else:
+            if outcome == "outdated":
+                job_queue.cancel(job["id"])
+            else:
+                job_queue.complete(job["id"])
+        finally:
+            _outdated_jobs.discard(job["id"])
+            if _in_flight.get(job["coalesce_key"], (None,))[0] == job["id"]:
+                del _in_flight[job["coalesce_key"]]
+
+
+def cancel_outdated_review(coalesce_key):
+    running = _in_flight.get(coalesce_key)
+    if running is not None:
+        job_id, task = running
+        _outdated_jobs.add(job_id)
+        task.cancel()
+
+
+@app.on_event("startup")
+async def start_workers():
+    recovered = job_queue.recover()
+    if recovered:
+        print(f"Requeued {recovered} job(s) interrupted by the last shutdown")
+    for worker_id in range(WEBHOOK_WORKERS):
+        _workers.append(asyncio.create_task(worker(worker_id)))
+
+
+@app.on_event("shutdown")
+async def close_github_client():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    await close_async_client()
 
 
 @app.post("/pr-reviewer-webhook")
@@ -24,7 +188,7 @@ async def pr_reviewer_webhook(request: Request, x_hub_signature_256: str = Heade
     # Verify GitHub signature
     mac = hmac.new(WEBHOOK_SECRET.encode(), msg=body, digestmod=hashlib.sha256)
     expected_signature = f"sha256={mac.hexdigest()}"
-    if not hmac.compare_digest(expected_signature, x_hub_signature_256):
+    if not hmac.compare_digest(expected_signature, x_hub_signature_256 or ""):
         raise HTTPException(status_code=401, detail="Invalid signature")
 
     payload = json.loads(body)
@@ -34,34 +198,41 @@ async def pr_reviewer_webhook(request: Request, x_hub_signature_256: str = Heade
 
     pr = payload["pull_request"]
     repo = payload["repository"]["full_name"]
-    pr_number = pr["number"]
-    title = pr["title"]
-    author = pr["user"]["login"]
-    comments_url = pr["comments_url"]
-
-    # Get PR diff
-    diff_text = get_diff(repo, pr_number, GITHUB_TOKEN)
-
-    # Run AI code review
-    suggestions = review_pr(diff_text)
+    coalesce_key = f"{repo}#{pr['number']}"
+    # Only what the worker needs is persisted, not the whole delivery
+    job_id, superseded = job_queue.enqueue("review", {
+        "repo": repo,
+        "pr_number": pr["number"],
+        "title": pr["title"],
+        "author": pr["user"]["login"],
+        "comments_url": pr["comments_url"],
+        "base_sha": pr["base"]["sha"],
+        "head_sha": pr["head"]["sha"],
+        "additions": pr.get("additions", 0),
+        "deletions": pr.get("deletions", 0),
+    }, delay=WEBHOOK_QUIET_SECONDS, coalesce_key=coalesce_key)
+    cancel_outdated_review(coalesce_key)
+    _job_available.set()
+
+    return JSONResponse(
+        status_code=202,
+        content={"status": "queued", "job_id": job_id, "superseded": superseded},
+    )
+
+
+@app.get("/queue")
+async def queue_depth():
+    return job_queue.depth()
 
-    # Post comment back to PR
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
 
-    comment_body = {
-        "body": f"🤖 **AI Code Review Suggestions for #{pr_number} - {title}**\n\n"
-                f"👤 Author: `{author}`\n\n"
-                f"---\n\n"
-                f"{suggestions}"
-    }
-
-    async with httpx.AsyncClient() as client:
-        await client.post(comments_url, headers=headers, json=comment_body)
-
-    return {"status": "success"}
 @app.get("/health")
-async def pr_reviewer_webhook(request: Request):
+async def health():
     return {"status": "Good"}
+
+
+@app.get("/metrics")
+async def metrics():
+    for status, count in job_queue.depth().items():
+        WEBHOOK_JOBS.labels(status).set(count)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)